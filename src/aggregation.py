@@ -0,0 +1,147 @@
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+PET_TYPE = 'Pet'
+
+
+def get_log_columns(log) -> Tuple[Sequence[str], Sequence[str], Sequence[float]]:
+    """
+    Return the name, type and total columns of a report table, whether its
+    entries are a list of records or a columnar projection.
+    """
+    entries = log['entries']
+    if isinstance(entries, dict):
+        return entries['name'], entries['type'], entries['total']
+    return (
+        [entry['name'] for entry in entries],
+        [entry['type'] for entry in entries],
+        [entry['total'] for entry in entries]
+    )
+
+
+def normalize_log(log) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Drop pets and return each player's name, class and share of the log's
+    total in percent.
+    """
+    names, types, totals = get_log_columns(log)
+    names = np.asarray(names, dtype=object)
+    types = np.asarray(types, dtype=object)
+    totals = np.asarray(totals, dtype=float)
+
+    players = types != PET_TYPE
+    totals = totals[players]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = 100 * totals / totals.sum()
+
+    return names[players], types[players], normalized
+
+
+class LogAverager():
+    """
+    Incrementally averages normalized totals per player. Players are interned
+    to array positions, and sums, sums of squares and counts are accumulated
+    with vectorized updates, so adding a log costs one pass over its entries.
+    """
+
+    def __init__(self) -> None:
+        self.__players = {}
+        self.__names = []
+        self.__classes = []
+        self.__sums = np.zeros(0)
+        self.__squares = np.zeros(0)
+        self.__counts = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __intern(self, names: Iterable[str], classes: Iterable[str]) -> np.ndarray:
+        indices = []
+        for name, class_ in zip(names, classes):
+            index = self.__players.get(name)
+            if index is None:
+                index = self.__players[name] = len(self.__names)
+                self.__names.append(name)
+                self.__classes.append(class_)
+            elif class_ > self.__classes[index]:
+                self.__classes[index] = class_
+            indices.append(index)
+
+        grow = len(self.__names) - len(self.__sums)
+        if grow > 0:
+            self.__sums = np.concatenate([self.__sums, np.zeros(grow)])
+            self.__squares = np.concatenate([self.__squares, np.zeros(grow)])
+            self.__counts = np.concatenate([self.__counts, np.zeros(grow, dtype=np.int64)])
+
+        return np.asarray(indices, dtype=np.intp)
+
+    def add_normalized(self, names, classes, normalized) -> None:
+        indices = self.__intern(names, classes)
+        normalized = np.asarray(normalized, dtype=float)
+        np.add.at(self.__sums, indices, normalized)
+        np.add.at(self.__squares, indices, normalized ** 2)
+        np.add.at(self.__counts, indices, 1)
+
+    def add_log(self, log) -> None:
+        self.add_normalized(*normalize_log(log))
+
+    def result(self) -> pd.DataFrame:
+        """
+        Return the average, population standard deviation and count of each
+        player's share, together with their class, sorted by the average.
+        """
+        counts = self.__counts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = self.__sums / counts
+            variances = np.maximum(self.__squares / counts - averages ** 2, 0)
+
+        return pd.DataFrame(
+            {
+                '_std': np.sqrt(variances),
+                '_avg': averages,
+                '_counts': counts,
+                '_class': self.__classes
+            },
+            index=pd.Index(self.__names, name='name')
+        ).sort_values('_avg')
+
+
+class AggregateView():
+    """
+    Averaged frame for one report selection, kept server-side so filter
+    changes only slice it. Classes are held as categorical codes and the
+    boolean mask for each class selection is computed once.
+    """
+
+    def __init__(self, df: pd.DataFrame, threshold: float) -> None:
+        self.df = df
+        self.threshold = threshold
+        self.__classes = pd.Categorical(df['_class'])
+        self.__averages = df['_avg'].to_numpy()
+        self.__masks = {}
+
+    @property
+    def size(self) -> int:
+        return int(self.df.memory_usage(deep=True).sum())
+
+    def __get_mask(self, classes: Optional[Iterable[str]]) -> np.ndarray:
+        key = frozenset(classes or ())
+        mask = self.__masks.get(key)
+        if mask is None:
+            if key:
+                codes = self.__classes.categories.get_indexer(list(key))
+                mask = np.isin(self.__classes.codes, codes[codes >= 0])
+            else:
+                mask = np.ones(len(self.df), dtype=bool)
+
+            # Players below the threshold of the best selected player are dropped
+            if mask.any():
+                mask = mask & (self.__averages > self.__averages[mask].max() * self.threshold)
+
+            self.__masks[key] = mask
+        return mask
+
+    def select(self, classes: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return self.df[self.__get_mask(classes)]
@@ -1,30 +1,32 @@
-import time
 import json
+from functools import lru_cache
 import dash
 import dash_auth
 import dash_core_components as dcc
 import dash_html_components as html
-import plotly.graph_objects as go
-import yaml
 from json.decoder import JSONDecodeError
 from dash.dependencies import Input, Output, State
 from dash import no_update
 from dotenv import load_dotenv, find_dotenv
+from flask import Response
 
+from cache import MISSING, LocalCache
 from client import WCLClient
+from config import CLASS_COLORS, get_encounter_options, load_users
 from divs import reports_search_div, reports_select_div
-from loggers.logger import Logger
-from utils import average_logs, parse_users, remove_irrelevant_roles
+from loggers.logger import Logger, get_request_user
+from metrics import AVERAGE_LATENCY, CONTENT_TYPE, FIGURE_LATENCY, REGISTRY
+from prefetch import Prefetcher
+from utils import THRESHOLD_PERCENTAGE, average_contributions, is_finished, parse_users
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
 # Global variables
-with open(r'configs/zone_settings.yaml') as file:
-    zones = yaml.load(file, Loader=yaml.FullLoader)
-
-with open(r'configs/class_settings.yaml') as file:
-    class_settings = yaml.load(file, Loader=yaml.FullLoader)
+AGGREGATES_MAX_BYTES = 16 * 1024 * 1024
+AGGREGATES_TTL = 60 * 5
+PREFETCH_REPORTS = 3
+PREFETCH_VIEW = 'damage-done'
 
 # Initialize the app
 app = dash.Dash(__name__)
@@ -34,13 +36,31 @@ app.config.suppress_callback_exceptions = True
 # Initialize logger
 logger = Logger().getLogger(__file__)
 
-# Initialize WCL client
-client = WCLClient()
+
+@lru_cache(maxsize=None)
+def get_client() -> WCLClient:
+    """
+    The WCL client, and with it the cache connection, is created on first use
+    so workers don't block on Redis while booting.
+    """
+    return WCLClient()
+
+
+# Averaged report selections, see get_aggregate
+aggregates = LocalCache(max_bytes=AGGREGATES_MAX_BYTES, ttl=AGGREGATES_TTL)
+
+
+@lru_cache(maxsize=None)
+def get_prefetcher() -> Prefetcher:
+    """
+    Background cache warm-up of reports users are likely to pick.
+    """
+    return Prefetcher(get_client())
+
 
 # Get users
 try:
-    with open(r'configs/users.yaml') as file:
-        USERS = yaml.load(file, Loader=yaml.FullLoader)
+    USERS = load_users()
 except FileNotFoundError:
     logger.error("User list not found.")
     raise
@@ -103,6 +123,11 @@ def set_update_graph_callback(app):
             Input('classdropdown', 'value'),
             Input('viewdropdown', 'value'),
             Input('encounterdropdown', 'value')
+        ],
+        [
+            State('guildinput', 'value'),
+            State('serverinput', 'value'),
+            State('regionselect', 'value')
         ]
     )
 
@@ -141,7 +166,7 @@ def get_reports(
     if trigger == 'submit-val':
         logger.info("Fetching reports..")
         try:
-            reports = client.get_reports(guild, server, region)
+            reports = get_client().get_reports(guild, server, region)
         except (JSONDecodeError, NameError, TypeError):
             logger.exception('Could not get reports')
             get_reports_error = True
@@ -160,19 +185,14 @@ def get_reports(
             report_option.pop('guild', None)
 
         if zone:
-            for val in zones.values():
-                if val['id'] == zone:
-                    encounters = [
-                        {
-                            'label': encounter['name'],
-                            'value': encounter['id']
-                        } for encounter in val['encounters']
-                    ]
-                    break
+            encounters = list(get_encounter_options(zone))
+
+        prefetch_reports(report_options, encounters, guild, server, region)
 
     elif trigger == 'back':
         form_style = {'display': 'block'}
         select_style = {'display': 'none'}
+        get_prefetcher().cancel(get_request_user())
         logger.info("Displaying report search form.")
 
     else:
@@ -181,88 +201,171 @@ def get_reports(
     return form_style, select_style, report_options, encounters, get_reports_error
 
 
-@set_update_graph_callback(app)
-def update_graph(reports, classes, view, encounter):
-
-    update_triggers = {'reportdropdown', 'classdropdown', 'viewdropdown', 'encounterdropdown'}
+def get_aggregate(reports, view, encounter, guild, server, region):
+    """
+    Averaged view of a report selection. Kept in-process for a short while,
+    so filter changes on the same selection skip fetching and averaging.
+    """
+    key = json.dumps([reports, view, encounter, guild, server, region])
+    aggregate = aggregates.get(key)
+    if aggregate is not MISSING:
+        return aggregate
+
+    logger.info("Fetching logs..")
+    with AVERAGE_LATENCY.time(stage='fetch') as timer:
+        contributions = fetch_contributions(reports, view, encounter, guild, server, region)
+    logger.info('Done fetching logs. Took {} s.'.format(timer.elapsed))
+
+    # TODO Inform user that some (or all) logs might be missing in the graph
+    if not contributions:
+        return None
+
+    from aggregation import AggregateView
+
+    logger.info("Calculating average..")
+    with AVERAGE_LATENCY.time(stage='average') as timer:
+        aggregate = AggregateView(average_contributions(contributions), THRESHOLD_PERCENTAGE)
+    logger.info('Done calculating average for logs. Took {} s.'.format(timer.elapsed))
+
+    aggregates.set(key, aggregate, aggregate.size)
+    return aggregate
+
+
+def fetch_contributions(reports, view, encounter, guild, server, region):
+    contribution_requests = []
+    metadata = get_client().get_report_metadata(guild, server, region, reports)
+    for report_id, report in zip(reports, metadata):
+
+        if report is None:
+            logger.warning(f"Report {report_id} is not listed for {guild}-{server}-{region}, skipping it.")
+            continue
+
+        contribution_requests.append(
+            {
+                'view': view,
+                'log_id': report['id'],
+                'end': report['end'] - report['start'],
+                'encounter': encounter,
+                'finished': is_finished(report)
+            }
+        )
+
+    # Failed fetches give None and tables without entries empty contributions
+    return [
+        contribution for contribution in get_client().get_contributions(contribution_requests)
+        if contribution and contribution['name']
+    ]
+
+
+def prefetch_reports(report_options, encounters, guild, server, region):
+    """
+    Warm the cache for the newest reports with the default view, for every
+    encounter of the selected zone.
+    """
+    reports = get_client().get_report_metadata(
+        guild,
+        server,
+        region,
+        [report_option['value'] for report_option in report_options]
+    )
+    reports = sorted(
+        (report for report in reports if report),
+        key=lambda report: report['start'],
+        reverse=True
+    )[:PREFETCH_REPORTS]
 
-    if all([reports, view, get_trigger() in update_triggers]):
+    encounter_ids = [encounter['value'] for encounter in encounters] or ['']
 
-        logger.info("Fetching logs..")
-        t0 = time.time()
-        logs = []
-        for report in reports:
+    get_prefetcher().schedule(
+        get_request_user(),
+        [
+            {
+                'view': PREFETCH_VIEW,
+                'log_id': report['id'],
+                'end': report['end'] - report['start'],
+                'encounter': encounter_id,
+                'finished': is_finished(report)
+            } for report in reports for encounter_id in encounter_ids
+        ]
+    )
 
-            loaded_report = json.loads(report)
-            report_id = loaded_report['id']
 
-            log = client.get_log(
-                view = view,
-                log_id = report_id,
-                end = loaded_report['end'] - loaded_report['start'],
-                encounter = encounter
+def build_figure(df, view):
+    colors = [CLASS_COLORS[class_] for class_ in df['_class']]
+
+    import plotly.graph_objects as go
+
+    figure = go.Figure()
+    figure.add_trace(
+        go.Bar(
+            x = df.index,
+            y = df._avg,
+            customdata = df._counts,
+            hovertemplate = "Damage: %{y}<br>Counts: %{customdata}<extra></extra>",
+            marker = dict(color=[color for color in colors]),
+            error_y = dict(
+                type = 'data',
+                array = df._std,
+                thickness = 1.5,
+                width = 3,
             )
+        )
+    )
 
-            if log.get('entries', None):
-                logs.append(log)
-
-        t1 = time.time()
-        logger.info('Done fetching logs. Took {} s.'.format(t1 - t0))
-        
-        # TODO Inform user that some (or all) logs might be missing in the graph
-        if logs:
-
-            logger.info("Calculating average..")
-            t0 = time.time()
-            df = average_logs(logs)
-            t1 = time.time()
-            logger.info('Done calculating average for logs. Took {} s.'.format(t1 - t0))
-
-            class_index = [
-                True if class_ in classes else False for class_ in df['_class']
-            ] if classes else [True] * len(df)
-
-            df = df[class_index].pipe(remove_irrelevant_roles)
-
-            colors = [class_settings[class_]['color'] for class_ in df['_class']]
-
-            figure = go.Figure()
-            figure.add_trace(
-                go.Bar(
-                    x = df.index,
-                    y = df._avg,
-                    customdata = df._counts,
-                    hovertemplate = "Damage: %{y}<br>Counts: %{customdata}<extra></extra>",
-                    marker = dict(color=[color for color in colors]),
-                    error_y = dict(
-                        type = 'data',
-                        array = df._std,
-                        thickness = 1.5,
-                        width = 3,
-                    )
-                )
-            )
+    figure.update_layout(
+        template = 'plotly_dark',
+        paper_bgcolor = 'rgba(0, 0, 0, 0)',
+        plot_bgcolor = 'rgba(0, 0, 0, 0)',
+        margin = {'b': 20},
+        bargap = 0.3,
+        hovermode = 'x',
+        autosize = True,
+        title = {
+            'text': f'Percentage of total {view}',
+            'font': {'color': 'white'},
+            'x': 0.5
+        }
+    )
 
-            figure.update_layout(
-                template = 'plotly_dark',
-                paper_bgcolor = 'rgba(0, 0, 0, 0)',
-                plot_bgcolor = 'rgba(0, 0, 0, 0)',
-                margin = {'b': 20},
-                bargap = 0.3,
-                hovermode = 'x',
-                autosize = True,
-                title = {
-                    'text': f'Percentage of total {view}',
-                    'font': {'color': 'white'},
-                    'x': 0.5
-                }
-            )
+    return figure
+
+
+def build_graph(reports, classes, view, encounter, guild, server, region):
+    """
+    Graph of a report selection of a guild, or None when none of its logs has
+    entries.
+    """
+    aggregate = get_aggregate(reports, view, encounter, guild, server, region)
+
+    if not aggregate:
+        return None
+
+    with FIGURE_LATENCY.time():
+        logger.info(f"Removing players with avg less than {THRESHOLD_PERCENTAGE} of max.")
+        figure = build_figure(aggregate.select(classes), view)
 
-            logger.info("Graph updated.")
-            return dcc.Graph(id='test', figure=figure)
+    logger.info("Graph updated.")
+    return dcc.Graph(id='test', figure=figure)
+
+
+@set_update_graph_callback(app)
+def update_graph(reports, classes, view, encounter, guild, server, region):
+
+    update_triggers = {'reportdropdown', 'classdropdown', 'viewdropdown', 'encounterdropdown'}
+
+    if all([reports, view, get_trigger() in update_triggers]):
+        return build_graph(reports, classes, view, encounter, guild, server, region)
     return
 
 
+@server.route('/metrics')
+def metrics():
+    # dash_auth only guards Dash's own routes, so check the same users here
+    if not auth.is_authorized():
+        return auth.login_request()
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
 @set_clear_filters_callback(app)
 def clear_page(n_clicks):
     if get_trigger() == 'back':
@@ -0,0 +1,359 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from json.decoder import JSONDecodeError
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+from furl import furl
+
+from cache import MISSING, Cache
+from client import (
+    BACKOFF_FACTOR,
+    BASE_LOG_URL,
+    BASE_REPORT_URL,
+    POOL_SIZE,
+    REPORTS_MAX_STALE,
+    RETRIES,
+    RETRY_STATUSES,
+    create_log_store,
+    create_reports_envelope,
+    get_cache_namespace,
+    get_known_reports,
+    get_log_ttl,
+    get_projection,
+    get_rate_limit_backoff,
+    get_report_index,
+    get_report_options,
+    get_reports_ttl,
+    get_retry_delay,
+    get_revalidation_headers,
+    merge_reports,
+    parse_log,
+    parse_reports
+)
+from loggers.logger import Logger
+from metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES
+
+MAX_CONCURRENCY = 16
+TIMEOUT = 30
+
+
+class AsyncWCLClient():
+    """
+    Non-blocking counterpart of WCLClient. Shares its cache namespaces, TTL
+    policy, log store and response handling, so both clients read and write
+    the same entries. Misses are coalesced behind the cache's leases like in
+    WCLClient. redis-py and sqlite are blocking, so cache and store work runs
+    on a thread pool while upstream requests stay on the event loop.
+    Upstream requests are retried and counted like WCLClient's, and wait
+    while upstream rate limits the client.
+    """
+
+    def __init__(
+        self,
+        base_report_url: str = BASE_REPORT_URL,
+        base_log_url: str = BASE_LOG_URL,
+        max_concurrency: int = MAX_CONCURRENCY,
+        pool_size: int = POOL_SIZE,
+        timeout: float = TIMEOUT,
+        retries: int = RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        cache: Optional[Cache] = None
+    ) -> None:
+        self.report_url = base_report_url
+        self.log_url = base_log_url
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.rate_limited_until = 0.0
+        self.__api_key = os.getenv("API_KEY")
+        self.logger = Logger().getLogger(__file__)
+        self.logger.info("Initialize AsyncWCLClient.")
+        self.__cache = cache or Cache()
+        self.__store = create_log_store()
+        # One thread per request in flight, plus one for background refreshes
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency + 1, thread_name_prefix='async-wcl-cache')
+        self.__refreshes = set()
+        self.__session = None
+        self.__loop = None
+        self.__loop_lock = threading.Lock()
+
+    def __add_api_key(self, url: str) -> str:
+        return furl(url).add({'api_key': self.__api_key}).url
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        # The session is bound to the running loop, so it is created lazily
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.__session
+
+    async def __request(self, url: str, endpoint: str, headers: Optional[Dict] = None):
+        """
+        GET url, returning its status, headers and body. Connection errors,
+        timeouts, 429 and 5xx responses are retried with the same backoff as
+        WCLClient's session.
+        """
+        for attempt in range(self.retries + 1):
+            await self.__wait_rate_limit()
+            try:
+                with UPSTREAM_LATENCY.time(endpoint=endpoint) as timer:
+                    async with self.__get_session().get(url, headers=headers) as response:
+                        status = response.status
+                        response_headers = response.headers
+                        text = await response.text()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(get_retry_delay(attempt, self.backoff_factor))
+                continue
+            UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=status)
+            self.logger.debug('Done. API call to %s took %s s.', endpoint, timer.elapsed)
+
+            retry_after = response_headers.get('Retry-After')
+            if status == 429:
+                self.__set_rate_limited(retry_after)
+            if status not in RETRY_STATUSES or attempt == self.retries:
+                return status, response_headers, text
+            await asyncio.sleep(get_retry_delay(attempt, self.backoff_factor, retry_after))
+
+    def __set_rate_limited(self, retry_after: Optional[str]) -> None:
+        backoff = get_rate_limit_backoff(retry_after)
+        self.rate_limited_until = time.monotonic() + backoff
+        self.logger.warning(f"Rate limited by upstream for {backoff} s.")
+
+    async def __wait_rate_limit(self) -> None:
+        # Requests in flight all hold off, rather than each running into the limit
+        delay = self.rate_limited_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def __parse_json(self, text: str):
+        try:
+            return json.loads(text)
+        except JSONDecodeError as e:
+            self.logger.error("Couldn't parse response as json: '%s'", text)
+            raise e
+
+    async def __in_executor(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.__executor, partial(func, *args, **kwargs)
+        )
+
+    async def __cached(self, cache_call, namespace: str, ttl, fetch, *args):
+        """
+        Cache.get_or_set or Cache.fill for a coroutine. The cache runs on the
+        thread pool and hands computing the value back to the event loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        def compute(*args):
+            return asyncio.run_coroutine_threadsafe(fetch(*args), loop).result()
+
+        return await self.__in_executor(cache_call, namespace, compute, *args, ttl=ttl)
+
+    async def __fetch_reports(
+        self,
+        guild: str,
+        server: str,
+        region: str,
+        cached: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Fetch a guild's report list into a cache envelope, conditionally on a
+        cached one, see WCLClient.
+        """
+        url = self.__add_api_key(
+            self.report_url.format(guild=guild, server=server, region=region)
+        )
+
+        self.logger.debug("Requesting reports from url: %s", url)
+        status, headers, text = await self.__request(url, 'reports', get_revalidation_headers(cached))
+        fetched_at = time.time()
+
+        if cached and status == 304:
+            return dict(cached, fetched_at=fetched_at)
+
+        reports = self.__parse_json(text)
+        known = get_known_reports(cached)
+        if known and isinstance(reports, list):
+            reports = [report for report in reports if report.get('id') not in known]
+
+        return create_reports_envelope(
+            merge_reports(parse_reports(reports, self.logger), cached),
+            fetched_at=fetched_at,
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified')
+        )
+
+    async def __index_reports(self, guild: str, server: str, region: str, envelope: Dict) -> None:
+        await self.__in_executor(
+            self.__cache.set_index,
+            get_report_index(guild, server, region),
+            {report['id']: report for report in envelope['reports']},
+            ttl=REPORTS_MAX_STALE,
+            replace=True
+        )
+
+    async def __refresh_reports(self, guild: str, server: str, region: str, cached: Dict) -> None:
+        namespace = get_cache_namespace("_get_reports")
+        key = self.__cache.get_key(namespace, guild, server, region)
+        token = await self.__in_executor(self.__cache.acquire_lease, key)
+        if token is None:
+            return  # Another worker is already refreshing this list
+
+        try:
+            envelope = await self.__fetch_reports(guild, server, region, cached)
+            await self.__in_executor(
+                self.__cache.set, namespace, envelope, guild, server, region, ttl=REPORTS_MAX_STALE
+            )
+            await self.__index_reports(guild, server, region, envelope)
+        except Exception:
+            self.logger.exception(f"Could not refresh reports for {guild}-{server}-{region}.")
+        finally:
+            await self.__in_executor(self.__cache.release_lease, key, token)
+
+    async def get_reports(
+        self,
+        guild: str,
+        server: str,
+        region: str
+    ):
+        """
+        Report list of a guild, served stale-while-revalidate, see WCLClient.
+        """
+        namespace = get_cache_namespace("_get_reports")
+        envelope = await self.__in_executor(self.__cache.get, namespace, guild, server, region)
+
+        if envelope is MISSING:
+            envelope = await self.__cached(
+                self.__cache.fill, namespace, REPORTS_MAX_STALE, self.__fetch_reports, guild, server, region
+            )
+            await self.__index_reports(guild, server, region, envelope)
+        elif time.time() - envelope['fetched_at'] > get_reports_ttl(envelope['reports']):
+            self.logger.info(f"Refreshing reports for {guild}-{server}-{region} in the background.")
+            # Keep a reference, the loop only holds weak ones to tasks
+            refresh = asyncio.ensure_future(self.__refresh_reports(guild, server, region, envelope))
+            self.__refreshes.add(refresh)
+            refresh.add_done_callback(self.__refreshes.discard)
+
+        return get_report_options(envelope)
+
+    async def __fetch_log(self, view: str, log_id: str, end: str, encounter: str):
+        url = self.__add_api_key(
+            self.log_url.format(view=view, log_id=log_id, end=end, encounter=encounter)
+        )
+
+        self.logger.debug("Fetching logs from url: %s", url)
+        _, _, text = await self.__request(url, 'tables')
+
+        return parse_log(self.__parse_json(text), self.logger)
+
+    async def get_log(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str,
+        columns: Optional[Sequence[str]] = None,
+        finished: bool = False
+    ):
+        """
+        Fetch a report table, see WCLClient.get_log.
+        """
+        if not columns:
+            return await self.__cached(
+                self.__cache.get_or_set,
+                get_cache_namespace("_get_log"),
+                get_log_ttl(finished),
+                self.__fetch_log,
+                view,
+                log_id,
+                end,
+                encounter
+            )
+
+        loop = asyncio.get_running_loop()
+
+        def fetch_log(*args):
+            return asyncio.run_coroutine_threadsafe(self.__fetch_log(*args), loop).result()
+
+        def get_log_columns(view: str, log_id: str, end: str, encounter: str, columns: List[str]):
+            return get_projection(
+                self.__cache, self.__store, fetch_log, view, log_id, end, encounter, columns, finished
+            )
+
+        return await self.__in_executor(
+            self.__cache.get_or_set,
+            get_cache_namespace("_get_log_columns"),
+            get_log_columns,
+            view,
+            log_id,
+            end,
+            encounter,
+            list(columns),
+            ttl=get_log_ttl(finished)
+        )
+
+    async def get_logs(self, log_requests: List[Dict], max_concurrency: Optional[int] = None):
+        """
+        Fetch several logs concurrently, with at most max_concurrency requests
+        in flight. Each request holds the keyword arguments of get_log.
+        Results are returned in input order.
+        """
+        semaphore = asyncio.Semaphore(min(max_concurrency or self.max_concurrency, self.max_concurrency))
+
+        async def bounded(request):
+            async with semaphore:
+                return await self.get_log(**request)
+
+        return await asyncio.gather(*[bounded(request) for request in log_requests])
+
+    async def close(self) -> None:
+        if self.__session is not None:
+            await self.__session.close()
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.__loop_lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self.__loop.run_forever,
+                    name='async-wcl-client',
+                    daemon=True
+                ).start()
+        return self.__loop
+
+    def run(self, coroutine):
+        """
+        Sync facade for Dash callbacks. Coroutines run on a background event
+        loop shared by every caller in this process, so the HTTP session and
+        its connections are reused between callbacks.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__get_loop()).result()
+
+    def get_reports_sync(self, guild: str, server: str, region: str):
+        return self.run(self.get_reports(guild, server, region))
+
+    def get_log_sync(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str,
+        columns: Optional[Sequence[str]] = None,
+        finished: bool = False
+    ):
+        return self.run(self.get_log(view, log_id, end, encounter, columns, finished))
+
+    def get_logs_sync(self, log_requests: List[Dict], max_concurrency: Optional[int] = None):
+        return self.run(self.get_logs(log_requests, max_concurrency))
@@ -0,0 +1,14 @@
+import subprocess
+
+
+def get_commit() -> str:
+    """
+    Short hash of the checked out commit, recorded with results so runs can
+    be compared across commits.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
@@ -0,0 +1,134 @@
+"""
+Micro-benchmark of the aggregation steps on synthetic logs: average_logs,
+remove_irrelevant_roles and the class mask of AggregateView.select. Every
+combination of log count, raid size and roster churn is timed, and the peak
+memory allocated by each step is measured in a separate traced run.
+
+Run from the src directory, and compare against a previous run:
+
+    python -m benchmarks.averaging [--logs 1 10 50 200] [--raid-sizes 20 40]
+        [--churn 0 0.1 0.5] [--runs 5] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import itertools
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Dict
+
+from aggregation import AggregateView
+from benchmarks import get_commit
+from benchmarks.synthetic import generate_logs
+from utils import THRESHOLD_PERCENTAGE, average_logs, remove_irrelevant_roles
+
+LOG_COUNTS = (1, 10, 50, 200)
+RAID_SIZES = (20, 40)
+CHURN = (0.0, 0.1, 0.5)
+RUNS = 5
+
+# A typical filter, the mask step is measured for a selection of classes
+CLASS_SELECTION = ('Mage', 'Warlock', 'Rogue')
+
+
+def measure(func, *args, runs: int) -> Dict:
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'peak_bytes': peak
+    }
+
+
+def select_classes(df, classes):
+    # A fresh view, so the mask is computed rather than served from its memo
+    return AggregateView(df, THRESHOLD_PERCENTAGE).select(classes)
+
+
+def run_case(log_count: int, raid_size: int, churn: float, runs: int) -> Dict:
+    logs = generate_logs(log_count, raid_size, churn)
+    df = average_logs(logs)
+
+    return {
+        'logs': log_count,
+        'raid_size': raid_size,
+        'churn': churn,
+        'players': len(df),
+        'average_logs': measure(average_logs, logs, runs=runs),
+        'remove_irrelevant_roles': measure(remove_irrelevant_roles, df, runs=runs),
+        'class_mask': measure(select_classes, df, CLASS_SELECTION, runs=runs)
+    }
+
+
+def get_case_key(case: Dict) -> str:
+    return f"{case['logs']}x{case['raid_size']}@{case['churn']}"
+
+
+def compare(results: Dict, baseline: Dict) -> Dict:
+    """
+    Ratio of each step's median time and peak memory to the baseline's,
+    above 1 is worse.
+    """
+    base_cases = {get_case_key(case): case for case in baseline.get('cases', [])}
+    ratios = {}
+    for case in results['cases']:
+        base = base_cases.get(get_case_key(case))
+        if not base:
+            continue
+        for step in ('average_logs', 'remove_irrelevant_roles', 'class_mask'):
+            ratios[f'{get_case_key(case)}.{step}'] = {
+                key: case[step][key] / base[step][key] if base[step][key] else None
+                for key in ('median_s', 'peak_bytes')
+            }
+    return ratios
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logs', type=int, nargs='+', default=LOG_COUNTS, help='logs per selection')
+    parser.add_argument('--raid-sizes', type=int, nargs='+', default=RAID_SIZES)
+    parser.add_argument('--churn', type=float, nargs='+', default=CHURN, help='share of the raid replaced per log')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against')
+    args = parser.parse_args()
+
+    # Keep the per-step logging out of the timings
+    logging.disable(logging.INFO)
+
+    results = {
+        'benchmark': 'averaging',
+        'commit': get_commit(),
+        'timestamp': int(time.time()),
+        'runs': args.runs,
+        'cases': [
+            run_case(log_count, raid_size, churn, args.runs)
+            for log_count, raid_size, churn in itertools.product(args.logs, args.raid_sizes, args.churn)
+        ]
+    }
+
+    if args.compare:
+        with open(args.compare) as file:
+            results['compare'] = compare(results, json.load(file))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
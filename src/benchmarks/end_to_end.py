@@ -0,0 +1,169 @@
+"""
+End-to-end benchmark of a report selection: report list, log fetches through
+WCLClient and the cache, averaging and the graph build behind update_graph,
+served by a local fake warcraftlogs (see benchmarks/fake_wcl.py).
+
+Needs Redis (REDIS_HOST/REDIS_PORT) and configs/users.yaml. Each selection
+size is measured in three states:
+    cold  nothing cached, every log is fetched from the fake server
+    warm  logs cached, the averaged selection is not
+    hot   the averaged selection is cached in-process
+
+Run from the src directory, and compare against a previous run:
+
+    python -m benchmarks.end_to_end [--sizes 1 10 50] [--runs 5] [--latency 0.05]
+        [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Dict, List, Sequence
+
+from benchmarks import get_commit
+from benchmarks.fake_wcl import FakeWCLServer
+
+SIZES = (1, 10, 50)
+RUNS = 5
+VIEW = 'damage-done'
+SERVER = 'firemaw'
+REGION = 'EU'
+
+
+def percentile(timings: Sequence[float], q: float) -> float:
+    ordered = sorted(timings)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(timings: List[float], reports: int) -> Dict:
+    total = sum(timings)
+    return {
+        'runs': len(timings),
+        'mean_s': statistics.mean(timings),
+        'p50_s': percentile(timings, 0.5),
+        'p90_s': percentile(timings, 0.9),
+        'p99_s': percentile(timings, 0.99),
+        'max_s': max(timings),
+        'reports_per_s': reports * len(timings) / total if total else None
+    }
+
+
+def import_app(url: str):
+    # The client reads its base URL and key on import and construction
+    os.environ['WCL_URL'] = url
+    os.environ.setdefault('API_KEY', 'benchmark')
+    try:
+        import app
+    except FileNotFoundError:
+        sys.exit('configs/users.yaml is required to import the app, see configs/templates.')
+    return app
+
+
+def time_call(func, *args) -> float:
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def run_size(app, size: int, runs: int) -> Dict:
+    from cache import LocalCache
+    from utils import average_logs, is_finished
+
+    client = app.get_client()
+    timings = {'reports': [], 'cold': [], 'warm': [], 'hot': [], 'average_logs': []}
+
+    for _ in range(runs):
+        # A new guild per run, so its reports have never been cached
+        guild = f'benchmark-{uuid.uuid4().hex[:8]}'
+        t0 = time.perf_counter()
+        report_options = client.get_reports(guild, SERVER, REGION)
+        timings['reports'].append(time.perf_counter() - t0)
+
+        reports = [report_option['value'] for report_option in report_options[:size]]
+
+        timings['cold'].append(time_call(app.build_graph, reports, None, VIEW, '', guild, SERVER, REGION))
+
+        app.aggregates = LocalCache(max_bytes=app.AGGREGATES_MAX_BYTES, ttl=app.AGGREGATES_TTL)
+        timings['warm'].append(time_call(app.build_graph, reports, None, VIEW, '', guild, SERVER, REGION))
+
+        timings['hot'].append(time_call(app.build_graph, reports, None, VIEW, '', guild, SERVER, REGION))
+
+        metadata = client.get_report_metadata(guild, SERVER, REGION, reports)
+        logs = client.get_logs([
+            {
+                'view': VIEW,
+                'log_id': report['id'],
+                'end': report['end'] - report['start'],
+                'encounter': '',
+                'finished': is_finished(report)
+            } for report in metadata
+        ])
+        timings['average_logs'].append(time_call(average_logs, logs))
+
+    return {
+        stage: summarize(stage_timings, 1 if stage == 'reports' else size)
+        for stage, stage_timings in timings.items()
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> Dict:
+    """
+    Ratio of each p50 and p90 to the baseline's, above 1 is slower.
+    """
+    ratios = {}
+    for size, stages in results['sizes'].items():
+        for stage, summary in stages.items():
+            base = baseline.get('sizes', {}).get(size, {}).get(stage)
+            if not base:
+                continue
+            ratios[f'{size}.{stage}'] = {
+                key: summary[key] / base[key] if base[key] else None for key in ('p50_s', 'p90_s')
+            }
+    return ratios
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='reports per selection')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every upstream response')
+    parser.add_argument('--rate-limit', type=float, help='upstream requests per second before answering 429')
+    parser.add_argument('--fixtures', help='directory of recorded fixtures, see benchmarks/fake_wcl.py')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against')
+    args = parser.parse_args()
+
+    with FakeWCLServer(args.fixtures, args.latency, args.rate_limit, report_count=max(args.sizes)) as fake:
+        app = import_app(fake.url)
+        sizes = {str(size): run_size(app, size, args.runs) for size in args.sizes}
+        upstream = {'requests': fake.requests, 'rate_limited': fake.rate_limited}
+
+    results = {
+        'benchmark': 'end_to_end',
+        'commit': get_commit(),
+        'timestamp': int(time.time()),
+        'latency_s': args.latency,
+        'rate_limit': args.rate_limit,
+        'upstream': upstream,
+        'cache': app.get_client().cache_stats(),
+        'sizes': sizes
+    }
+
+    if args.compare:
+        with open(args.compare) as file:
+            results['compare'] = compare(results, json.load(file))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Local stand-in for the warcraftlogs v1 API. Serves recorded fixtures, falling
+back to synthetic payloads, with configurable latency and rate limit.
+
+Recorded fixtures are read from a directory laid out as
+    reports/<guild>.json
+    tables/<view>/<log_id>.json
+
+Run standalone from the src directory and point the app at it with WCL_URL:
+
+    python -m benchmarks.fake_wcl [--port 8000] [--latency 0.1] [--rate-limit 20]
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+from benchmarks.synthetic import generate_log, generate_reports
+
+REPORTS_PATH = re.compile(r'^/v1/reports/guild/(?P<guild>[^/]+)/(?P<server>[^/]+)/(?P<region>[^/]+)$')
+TABLES_PATH = re.compile(r'^/v1/report/tables/(?P<view>[^/]+)/(?P<log_id>[^/]+)$')
+
+REPORT_COUNT = 60
+
+
+class RateLimiter():
+    """
+    Token bucket allowing rate requests per second, with bursts up to rate.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.__tokens = rate
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.rate, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return True
+            return False
+
+
+class FakeWCLServer():
+    def __init__(
+        self,
+        fixtures_dir: Optional[str] = None,
+        latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        report_count: int = REPORT_COUNT,
+        port: int = 0
+    ) -> None:
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.report_count = report_count
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.requests = 0
+        self.rate_limited = 0
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(('127.0.0.1', port), self.__create_handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeWCLServer':
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> 'FakeWCLServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def __load_fixture(self, *path: str):
+        if not self.fixtures_dir:
+            return None
+        fixture = os.path.join(self.fixtures_dir, *path)
+        if not os.path.isfile(fixture):
+            return None
+        with open(fixture) as file:
+            return json.load(file)
+
+    def respond(self, path: str):
+        """
+        Return the status, headers and JSON body for a request path.
+        """
+        with self.__lock:
+            self.requests += 1
+
+        if self.rate_limiter and not self.rate_limiter.allow():
+            with self.__lock:
+                self.rate_limited += 1
+            return 429, {'Retry-After': '1'}, {'status': 429, 'error': 'Too many requests.'}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        match = REPORTS_PATH.match(path)
+        if match:
+            guild = unquote(match['guild'])
+            reports = self.__load_fixture('reports', f'{guild}.json')
+            return 200, {}, reports if reports is not None else generate_reports(guild, self.report_count)
+
+        match = TABLES_PATH.match(path)
+        if match:
+            view, log_id = unquote(match['view']), unquote(match['log_id'])
+            log = self.__load_fixture('tables', view, f'{log_id}.json')
+            return 200, {}, log if log is not None else generate_log(log_id, view)
+
+        return 404, {}, {'status': 404, 'error': 'Not found.'}
+
+    def __create_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, headers, body = fake.respond(urlparse(self.path).path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--fixtures', help='directory of recorded fixtures')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--rate-limit', type=float, help='requests per second before answering 429')
+    args = parser.parse_args()
+
+    server = FakeWCLServer(args.fixtures, args.latency, args.rate_limit, port=args.port).start()
+    print(f'Serving fake warcraftlogs on {server.url}, set WCL_URL to use it.')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures how long a fresh interpreter takes to import a module, which is
+what a gunicorn worker pays when booting. Run from the src directory:
+
+    python -m benchmarks.startup [--module app] [--runs 10] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def time_import(module: str) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], check=True)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', help='module to import')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    # Baseline interpreter start-up, subtracted to isolate the import itself
+    baseline = min(time_import('sys') for _ in range(args.runs))
+    timings = [time_import(args.module) - baseline for _ in range(args.runs)]
+
+    results = {
+        'benchmark': 'startup',
+        'module': args.module,
+        'runs': args.runs,
+        'interpreter_s': baseline,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'max_s': max(timings)
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
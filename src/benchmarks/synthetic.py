@@ -0,0 +1,113 @@
+"""
+Deterministic synthetic warcraftlogs payloads for benchmarks.
+"""
+import hashlib
+import random
+from typing import Dict, List, Tuple
+
+CLASSES = ('Warrior', 'Rogue', 'Mage', 'Warlock', 'Hunter', 'Priest', 'Druid', 'Paladin', 'Shaman')
+
+# Classes that bring a pet entry to the tables
+PET_CLASSES = ('Hunter', 'Warlock')
+
+PLAYER_POOL_SIZE = 60
+RAID_SIZE = 40
+REPORT_DURATION = 3 * 60 * 60 * 1000  # ms
+REPORT_INTERVAL = 3 * 24 * 60 * 60 * 1000  # ms
+FIRST_REPORT_START = 1590000000000  # ms
+
+
+def generate_player_pool(size: int = PLAYER_POOL_SIZE, seed: int = 0) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    return [(f'Player{index}', rng.choice(CLASSES)) for index in range(size)]
+
+
+def generate_log(
+    log_id: str,
+    view: str = 'damage-done',
+    raid_size: int = RAID_SIZE,
+    player_pool: List[Tuple[str, str]] = None
+) -> Dict:
+    """
+    A /report/tables response for a raid drawn from the player pool. Entries
+    carry filler fields so payload sizes resemble real tables.
+    """
+    rng = random.Random(f'{log_id}:{view}')
+    player_pool = player_pool or generate_player_pool()
+    raid = rng.sample(player_pool, min(raid_size, len(player_pool)))
+
+    entries = []
+    for name, class_ in raid:
+        entries.append(generate_entry(rng, name, class_))
+        if class_ in PET_CLASSES:
+            entries.append(generate_entry(rng, f'{name}Pet', 'Pet'))
+
+    return {'entries': entries, 'totalTime': REPORT_DURATION}
+
+
+def generate_logs(
+    count: int,
+    raid_size: int = RAID_SIZE,
+    churn: float = 0.0,
+    view: str = 'damage-done',
+    seed: int = 0
+) -> List[Dict]:
+    """
+    Logs of a guild whose roster churns: each raid keeps a share of 1 - churn
+    of the previous raid and fills the rest with players never seen before.
+    """
+    rng = random.Random(seed)
+    next_player = 0
+
+    def recruit(size):
+        nonlocal next_player
+        players = [(f'Player{index}', rng.choice(CLASSES)) for index in range(next_player, next_player + size)]
+        next_player += size
+        return players
+
+    raid = recruit(raid_size)
+    logs = []
+    for index in range(count):
+        if index:
+            replaced = int(round(raid_size * churn))
+            raid = rng.sample(raid, raid_size - replaced) + recruit(replaced)
+        logs.append(generate_log(f'{seed}-{index}', view, raid_size, raid))
+    return logs
+
+
+def generate_entry(rng: random.Random, name: str, type_: str) -> Dict:
+    return {
+        'name': name,
+        'id': rng.randrange(1, 10 ** 6),
+        'guid': rng.randrange(1, 10 ** 8),
+        'type': type_,
+        'icon': f'{type_}-Spec',
+        'total': rng.randrange(10 ** 4, 10 ** 6),
+        'activeTime': rng.randrange(10 ** 5, REPORT_DURATION),
+        'itemLevel': rng.randrange(50, 80),
+        'gear': [{'id': rng.randrange(10 ** 5), 'slot': slot, 'quality': 4} for slot in range(18)],
+        'abilities': [
+            {'name': f'Ability{index}', 'total': rng.randrange(10 ** 5), 'type': 1}
+            for index in range(8)
+        ]
+    }
+
+
+def generate_report_id(guild: str, index: int) -> str:
+    return hashlib.sha1(f'{guild}:{index}'.encode()).hexdigest()[:16]
+
+
+def generate_reports(guild: str, count: int, zone: int = 1000) -> List[Dict]:
+    """
+    A /reports/guild response, newest report first.
+    """
+    return [
+        {
+            'id': generate_report_id(guild, index),
+            'title': f'{guild} raid {index}',
+            'owner': 'benchmark',
+            'start': FIRST_REPORT_START + index * REPORT_INTERVAL,
+            'end': FIRST_REPORT_START + index * REPORT_INTERVAL + REPORT_DURATION,
+            'zone': zone
+        } for index in reversed(range(count))
+    ]
@@ -1,34 +1,664 @@
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
 from json import dumps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import uuid4
 
-from redis import StrictRedis
-from redis_cache import RedisCache
+from redis import BlockingConnectionPool, StrictRedis
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError, TimeoutError as RedisTimeoutError
 
 from loggers.logger import Logger
+from metrics import CACHE_LOOKUPS, REDIS_ERRORS, REDIS_LATENCY
+from serializers import SerializationError, Serializer
+
+REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+# Connections shared by all threads of a worker. Callers block for up to
+# POOL_TIMEOUT seconds when all of them are in use.
+MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 32))
+POOL_TIMEOUT = 5  # seconds
+# Kept short so an unreachable Redis degrades requests to uncached instead of
+# stalling them. Redis is then bypassed for RETRY_INTERVAL seconds.
+SOCKET_CONNECT_TIMEOUT = 0.5  # seconds
+SOCKET_TIMEOUT = 2  # seconds
+RETRY_INTERVAL = 10  # seconds
+
+# Applied by an admin, see apply_memory_policy
+MAXMEMORY = '600mb'
+MAXMEMORY_POLICY = 'allkeys-lru'
+
+PREFIX = 'rc'
+DEFAULT_TTL = 60 * 60 * 24 * 7
+DEFAULT_LIMIT = 5000
+LOCK_TIMEOUT = 30  # seconds
+LOCK_POLL_INTERVAL = 0.05  # seconds
+L1_TTL = 60  # seconds, should not exceed the Redis TTLs it fronts
+
+# A TTL in seconds, or a policy returning one for the value being cached.
+# Zero or less means no expiry.
+TTL = Union[int, Callable[[object], int]]
+
+# Called by Cache.get_or_set with the tier that served a value, 'l1' or 'l2',
+# or None when the value had to be computed
+LookupCallback = Callable[[Optional[str]], None]
+
+# Returned by Cache.get when a key is not cached, since None is a valid value
+MISSING = object()
+
+# Stores a value and keeps at most `limit` keys per namespace by evicting the
+# least recently used ones. Scores in the namespace's sorted set are access times.
+SET_SCRIPT = """
+local ttl = tonumber(ARGV[2])
+if ttl > 0 then
+  redis.call('SETEX', KEYS[1], ttl, ARGV[1])
+else
+  redis.call('SET', KEYS[1], ARGV[1])
+end
+local limit = tonumber(ARGV[3])
+if limit > 0 then
+  redis.call('ZADD', KEYS[2], ARGV[4], KEYS[1])
+  local over = redis.call('ZCARD', KEYS[2]) - limit
+  if over > 0 then
+    local stale = redis.call('ZRANGE', KEYS[2], 0, over - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, over - 1)
+    redis.call('DEL', unpack(stale))
+  end
+end
+return 1
+"""
+
+# Releases a lock only if it is still held by the caller's token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalCache():
+    """
+    Size-bounded, in-process LRU with per-entry expiry. Sizes are the
+    uncompressed byte length of the serialized value, while the deserialized value is what gets
+    stored, so hits skip both the Redis round trip and deserialization.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float = L1_TTL) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: str):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self.__pop(key)
+                return MISSING
+            self.__entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, size: int, ttl: Optional[float] = None) -> None:
+        ttl = min(ttl, self.ttl) if ttl and ttl > 0 else self.ttl
+        with self.__lock:
+            # Drop the previous value even if the new one is too large to keep
+            if key in self.__entries:
+                self.__pop(key)
+            if size > self.max_bytes:
+                return
+            while self.size + size > self.max_bytes:
+                self.__pop(next(iter(self.__entries)))
+            self.__entries[key] = (time.monotonic() + ttl, size, value)
+            self.size += size
+
+    def __pop(self, key: str) -> None:
+        _, size, _ = self.__entries.pop(key)
+        self.size -= size
+
+
+class PoolExhaustedError(RedisError):
+    pass
+
+
+class CachePool(BlockingConnectionPool):
+    """
+    BlockingConnectionPool that tells a pool without free connections apart
+    from an unreachable Redis. The former only means the worker is busy.
+    """
+    # Raised by BlockingConnectionPool.get_connection once pool_timeout passes
+    EXHAUSTED_MESSAGE = 'No connection available.'
+
+    def get_connection(self, command_name, *keys, **options):
+        try:
+            return super().get_connection(command_name, *keys, **options)
+        except RedisConnectionError as e:
+            if str(e) == self.EXHAUSTED_MESSAGE:
+                raise PoolExhaustedError(f"No free connection after {self.timeout} s.") from e
+            raise
 
 
 class Cache():
     def __init__(
         self,
-        host: str = 'localhost',
-        port: int = 6379
+        host: str = REDIS_HOST,
+        port: int = REDIS_PORT,
+        lock_timeout: float = LOCK_TIMEOUT,
+        lock_poll_interval: float = LOCK_POLL_INTERVAL,
+        l1_max_bytes: int = 0,
+        l1_ttl: float = L1_TTL,
+        serializer: Optional[Serializer] = None,
+        max_connections: int = MAX_CONNECTIONS,
+        pool_timeout: float = POOL_TIMEOUT,
+        socket_connect_timeout: float = SOCKET_CONNECT_TIMEOUT,
+        socket_timeout: float = SOCKET_TIMEOUT,
+        retry_interval: float = RETRY_INTERVAL
     ) -> None:
-        self.__client = StrictRedis(host, port=port, decode_responses=True)
-        self.__client.config_set('maxmemory', '600mb')
-        self.__client.config_set('maxmemory-policy', 'allkeys-lru')
-        self.__cache = RedisCache(redis_client=self.__client)
+        self.lock_timeout = lock_timeout
+        self.lock_poll_interval = lock_poll_interval
+        self.retry_interval = retry_interval
+        self.__down_until = 0.0
+        self.__local = LocalCache(l1_max_bytes, l1_ttl) if l1_max_bytes > 0 else None
+        self.__stats = Counter()
+        self.__stats_lock = threading.Lock()
+        self.serializer = serializer or Serializer()
+        self.__pool = CachePool(
+            host=host,
+            port=port,
+            max_connections=max_connections,
+            timeout=pool_timeout,
+            socket_connect_timeout=socket_connect_timeout,
+            socket_timeout=socket_timeout
+        )
+        # Connections are only opened by the first command
+        self.__client = StrictRedis(connection_pool=self.__pool)
+        self.__set_script = self.__client.register_script(SET_SCRIPT)
+        self.__release_script = self.__client.register_script(RELEASE_SCRIPT)
         self.__logger = Logger().getLogger(__file__)
         self.__logger.info("Initialize Cache.")
 
+    @staticmethod
+    def get_key(namespace: str, *args, **kwargs) -> str:
+        serialized_data = dumps([list(args), kwargs])
+        return f'{PREFIX}:{namespace}:{serialized_data}'
+
+    @staticmethod
+    def get_keys_key(namespace: str) -> str:
+        return f'{PREFIX}:{namespace}:keys'
+
+    @staticmethod
+    def get_lock_key(key: str) -> str:
+        return f'{PREFIX}:lock:{key}'
+
+    @property
+    def available(self) -> bool:
+        """
+        False for retry_interval seconds after a Redis call failed to connect
+        or timed out, while the cache is bypassed.
+        """
+        return time.monotonic() >= self.__down_until
+
+    def __execute(self, operation: str, command: Callable, default=None):
+        """
+        Run a Redis command timed under the operation. While Redis is down the
+        command is skipped and default returned, so callers degrade to uncached.
+        When the pool has no free connection, or Redis answers with an error
+        such as OOM or READONLY, only this command is skipped.
+        """
+        if not self.available:
+            return default
+        try:
+            with REDIS_LATENCY.time(operation=operation):
+                return command()
+        except PoolExhaustedError:
+            REDIS_ERRORS.inc(operation=operation, reason='pool_exhausted')
+            self.__logger.warning(f"Redis connection pool exhausted during {operation}, skipping it.")
+            return default
+        except (RedisConnectionError, RedisTimeoutError):
+            self.__down_until = time.monotonic() + self.retry_interval
+            REDIS_ERRORS.inc(operation=operation, reason='unreachable')
+            self.__logger.warning(
+                f"Redis unreachable during {operation}, bypassing it for {self.retry_interval} s.",
+                exc_info=True
+            )
+            return default
+        except RedisError:
+            REDIS_ERRORS.inc(operation=operation, reason='error')
+            self.__logger.warning(f"Redis failed {operation}, skipping it.", exc_info=True)
+            return default
+
+    def apply_memory_policy(self, maxmemory: str = MAXMEMORY, policy: str = MAXMEMORY_POLICY) -> None:
+        """
+        Cap Redis' memory and set its eviction policy. An admin step rather
+        than part of start-up, as CONFIG is often disabled on managed Redis.
+        """
+        self.__client.config_set('maxmemory', maxmemory)
+        self.__client.config_set('maxmemory-policy', policy)
+        self.__logger.info(f"Applied maxmemory {maxmemory} with policy {policy}.")
+
     def key_exists(self, *args):
-        serialized_data = dumps([args[1:], {}])
-        key = f'rc:{args[0]}:{serialized_data}'
-        return self.__client.exists(key) >= 1
+        return self.__client.exists(self.get_key(args[0], *args[1:])) >= 1
 
     def get_all_keys(self):
-        return self.__client.keys()
+        return [key.decode() for key in self.__client.keys()]
 
     def get_key_count(self):
         return len(self.get_all_keys())
 
-    def __call__(self, ttl=60 * 60 * 24 * 7, limit=5000, namespace=None):
-        return self.__cache.cache(ttl, limit, namespace)
+    def stats(self) -> dict:
+        """
+        Hit/miss counters per tier. l1 is the in-process cache, l2 is Redis.
+        """
+        with self.__stats_lock:
+            stats = {
+                tier: {outcome: self.__stats[(tier, outcome)] for outcome in ('hits', 'misses')}
+                for tier in ('l1', 'l2')
+            }
+        if self.__local is not None:
+            stats['l1']['entries'] = len(self.__local)
+            stats['l1']['bytes'] = self.__local.size
+        stats['l2']['compression_ratio'] = self.serializer.compression_ratio
+        stats['l2']['available'] = self.available
+        return stats
+
+    def __count(self, tier: str, outcome: str) -> None:
+        with self.__stats_lock:
+            self.__stats[(tier, outcome)] += 1
+        CACHE_LOOKUPS.inc(tier=tier, result=outcome)
+
+    def __count_lookup(self, tier: Optional[str]) -> None:
+        """
+        Record one lookup served from tier, or missed by every tier if None.
+        """
+        if self.__local is not None:
+            self.__count('l1', 'hits' if tier == 'l1' else 'misses')
+        if tier != 'l1':
+            self.__count('l2', 'hits' if tier == 'l2' else 'misses')
+
+    @staticmethod
+    def __get_remaining_ttl(pttl: Optional[int]) -> Optional[float]:
+        # PTTL is -1 for keys without expiry, which leaves the local TTL as is
+        return pttl / 1000 if pttl and pttl > 0 else None
+
+    def get(self, namespace: str, *args, **kwargs):
+        """
+        Return the cached value for the arguments, or MISSING. A Redis hit
+        refreshes the key's position in the namespace's LRU set.
+        """
+        result, tier = self.__lookup(namespace, self.get_key(namespace, *args, **kwargs))
+        self.__count_lookup(tier)
+        return result
+
+    def __lookup(self, namespace: str, key: str) -> Tuple[object, Optional[str]]:
+        """
+        Return the cached value, or MISSING, and the tier it was found in.
+        Not counted, callers record one outcome per call.
+        """
+        if self.__local is not None:
+            result = self.__local.get(key)
+            if result is not MISSING:
+                return result, 'l1'
+
+        pipe = self.__client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        pipe.zadd(self.get_keys_key(namespace), {key: time.time()}, xx=True)
+        serialized, pttl, _ = self.__execute('get', pipe.execute, (None, None, None))
+
+        if serialized is None:
+            return MISSING, None
+
+        try:
+            result, size = self.serializer.decode(serialized)
+        except SerializationError:
+            self.__logger.warning(f"Ignoring unreadable cache entry {key}.", exc_info=True)
+            return MISSING, None
+
+        if self.__local is not None:
+            # Not kept locally for longer than Redis still holds it
+            self.__local.set(key, result, size, self.__get_remaining_ttl(pttl))
+        return result, 'l2'
+
+    def get_many(self, namespace: str, arguments: Sequence[Sequence]) -> List:
+        """
+        Batched get for several argument tuples of a namespace. Keys missing
+        from the local cache are read from Redis in a single round trip.
+        Returns the values in input order, MISSING for keys not cached.
+        """
+        keys = [self.get_key(namespace, *args) for args in arguments]
+        results = [MISSING] * len(keys)
+
+        if self.__local is not None:
+            for index, key in enumerate(keys):
+                results[index] = self.__local.get(key)
+                self.__count('l1', 'misses' if results[index] is MISSING else 'hits')
+
+        misses = [index for index, result in enumerate(results) if result is MISSING]
+        if not misses:
+            return results
+
+        pipe = self.__client.pipeline(transaction=False)
+        pipe.mget([keys[index] for index in misses])
+        now = time.time()
+        for index in misses:
+            pipe.pttl(keys[index])
+            pipe.zadd(self.get_keys_key(namespace), {keys[index]: now}, xx=True)
+        replies = self.__execute('get_many', pipe.execute)
+        if replies is None:
+            serialized_values, pttls = [None] * len(misses), [None] * len(misses)
+        else:
+            serialized_values, pttls = replies[0], replies[1::2]
+
+        for index, serialized, pttl in zip(misses, serialized_values, pttls):
+            if serialized is None:
+                self.__count('l2', 'misses')
+                continue
+            try:
+                result, size = self.serializer.decode(serialized)
+            except SerializationError:
+                self.__logger.warning(f"Ignoring unreadable cache entry {keys[index]}.", exc_info=True)
+                self.__count('l2', 'misses')
+                continue
+
+            self.__count('l2', 'hits')
+            results[index] = result
+            if self.__local is not None:
+                self.__local.set(keys[index], result, size, self.__get_remaining_ttl(pttl))
+
+        return results
+
+    def set(
+        self,
+        namespace: str,
+        value,
+        *args,
+        ttl: int = DEFAULT_TTL,
+        limit: int = DEFAULT_LIMIT,
+        **kwargs
+    ) -> None:
+        key = self.get_key(namespace, *args, **kwargs)
+        serialized, size = self.serializer.encode(value)
+        self.__execute('set', lambda: self.__set_script(
+            keys=[key, self.get_keys_key(namespace)],
+            args=[serialized, ttl, limit, time.time()]
+        ))
+        if self.__local is not None:
+            self.__local.set(key, value, size, ttl)
+
+    def set_many(
+        self,
+        namespace: str,
+        items: Sequence[Tuple[object, Sequence]],
+        ttl: TTL = DEFAULT_TTL,
+        limit: int = DEFAULT_LIMIT
+    ) -> None:
+        """
+        Batched set of (value, arguments) pairs in a single round trip. ttl
+        may be a policy called with each value.
+        """
+        if not items:
+            return
+
+        pipe = self.__client.pipeline(transaction=False)
+        now = time.time()
+        entries = []
+        for value, args in items:
+            key = self.get_key(namespace, *args)
+            serialized, size = self.serializer.encode(value)
+            value_ttl = ttl(value) if callable(ttl) else ttl
+            self.__set_script(
+                keys=[key, self.get_keys_key(namespace)],
+                args=[serialized, value_ttl, limit, now],
+                client=pipe
+            )
+            entries.append((key, value, size, value_ttl))
+
+        self.__execute('set_many', pipe.execute)
+
+        if self.__local is not None:
+            for key, value, size, value_ttl in entries:
+                self.__local.set(key, value, size, value_ttl)
+
+    def set_index(
+        self,
+        name: str,
+        mapping: Dict[str, object],
+        ttl: int = DEFAULT_TTL,
+        replace: bool = False
+    ) -> None:
+        """
+        Store values under fields of a Redis hash, for lookups by id across
+        workers. The hash's TTL is refreshed on every write. With replace, the
+        fields not in mapping are dropped. Fields are also kept in the local
+        cache, which get_index reads first.
+        """
+        key = f'{PREFIX}:{name}'
+        encoded = {field: self.serializer.encode(value) for field, value in mapping.items()}
+        if not encoded and not replace:
+            return
+
+        # A transaction when replacing, so readers never see the hash emptied
+        pipe = self.__client.pipeline(transaction=replace)
+        if replace:
+            pipe.delete(key)
+        if encoded:
+            pipe.hset(key, mapping={field: serialized for field, (serialized, _) in encoded.items()})
+            if ttl > 0:
+                pipe.expire(key, ttl)
+        self.__execute('set_index', pipe.execute)
+
+        if self.__local is not None:
+            for field, (_, size) in encoded.items():
+                self.__local.set(f'{key}:{field}', mapping[field], size, ttl)
+
+    def get_index(self, name: str, fields: List[str]) -> List[Optional[object]]:
+        """
+        Values of the fields in a hash written by set_index, None if missing.
+        Fields in the local cache are served without a Redis round trip.
+        """
+        key = f'{PREFIX}:{name}'
+        results = [MISSING] * len(fields)
+
+        if self.__local is not None:
+            for index, field in enumerate(fields):
+                results[index] = self.__local.get(f'{key}:{field}')
+                self.__count('l1', 'misses' if results[index] is MISSING else 'hits')
+
+        misses = [index for index, result in enumerate(results) if result is MISSING]
+        if misses:
+            pipe = self.__client.pipeline(transaction=False)
+            pipe.hmget(key, [fields[index] for index in misses])
+            pipe.pttl(key)
+            values, pttl = self.__execute('get_index', pipe.execute, ([None] * len(misses), None))
+
+            for index, value in zip(misses, values):
+                if value is None:
+                    self.__count('l2', 'misses')
+                    continue
+                try:
+                    result, size = self.serializer.decode(value)
+                except SerializationError:
+                    self.__logger.warning(f"Ignoring unreadable index entry {key}:{fields[index]}.", exc_info=True)
+                    self.__count('l2', 'misses')
+                    continue
+
+                self.__count('l2', 'hits')
+                results[index] = result
+                if self.__local is not None:
+                    self.__local.set(f'{key}:{fields[index]}', result, size, self.__get_remaining_ttl(pttl))
+
+        return [None if result is MISSING else result for result in results]
+
+    def acquire_lease(self, key: str) -> Optional[str]:
+        """
+        Try to take the short-lived lease on a key. Returns the token to release
+        it with, or None when another caller holds it. While Redis is down every
+        caller gets a token, so misses are computed without coalescing.
+        """
+        token = uuid4().hex
+        acquired = self.__execute(
+            'acquire_lease',
+            lambda: self.__client.set(self.get_lock_key(key), token, nx=True, px=int(self.lock_timeout * 1000)),
+            True
+        )
+        return token if acquired else None
+
+    def release_lease(self, key: str, token: str) -> None:
+        self.__execute(
+            'release_lease',
+            lambda: self.__release_script(keys=[self.get_lock_key(key)], args=[token])
+        )
+
+    def get_or_set(
+        self,
+        namespace: str,
+        func,
+        *args,
+        ttl: TTL = DEFAULT_TTL,
+        limit: int = DEFAULT_LIMIT,
+        on_lookup: Optional[LookupCallback] = None,
+        **kwargs
+    ):
+        """
+        Return the cached value, or compute and cache it. Concurrent misses on
+        the same key are coalesced: the caller holding the key's lease computes
+        the value while the others wait for it to appear in the cache. If the
+        lease is released or expires without a value, waiters compute it
+        themselves. ttl may be a policy called with the computed value.
+        on_lookup is called once per call, see LookupCallback. Hit and miss
+        counters also record one outcome per call, waiting included.
+        """
+        key = self.get_key(namespace, *args, **kwargs)
+        result, tier = self.__lookup(namespace, key)
+        if result is not MISSING:
+            self.__count_lookup(tier)
+            return self.__report(on_lookup, tier, result)
+
+        return self.__fill(namespace, func, args, kwargs, ttl, limit, on_lookup, count=True)
+
+    def fill(
+        self,
+        namespace: str,
+        func,
+        *args,
+        ttl: TTL = DEFAULT_TTL,
+        limit: int = DEFAULT_LIMIT,
+        on_lookup: Optional[LookupCallback] = None,
+        **kwargs
+    ):
+        """
+        The miss path of get_or_set, for callers that already looked the key
+        up, e.g. with get_many. Computes the value behind the key's lease or
+        waits for the lease holder, without repeating the initial lookup.
+        The caller's lookup already counted the miss.
+        """
+        return self.__fill(namespace, func, args, kwargs, ttl, limit, on_lookup, count=False)
+
+    def __fill(self, namespace, func, args, kwargs, ttl, limit, on_lookup, count: bool):
+        key = self.get_key(namespace, *args, **kwargs)
+        lock_key = self.get_lock_key(key)
+        token = self.acquire_lease(key)
+
+        if token is not None:
+            try:
+                return self.__resolve(on_lookup, None, self.__compute(namespace, func, args, kwargs, ttl, limit), count)
+            finally:
+                self.release_lease(key, token)
+
+        self.__logger.debug(f"Waiting for concurrent fetch of {lock_key}.")
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            result, tier = self.__lookup(namespace, key)
+            if result is not MISSING:
+                return self.__resolve(on_lookup, tier, result, count)
+            if not self.__execute('exists', lambda: self.__client.exists(lock_key), 0):
+                break
+
+        return self.__resolve(on_lookup, None, self.__compute(namespace, func, args, kwargs, ttl, limit), count)
+
+    def __resolve(self, on_lookup: Optional[LookupCallback], tier: Optional[str], result, count: bool):
+        if count:
+            self.__count_lookup(tier)
+        return self.__report(on_lookup, tier, result)
+
+    @staticmethod
+    def __report(on_lookup: Optional[LookupCallback], tier: Optional[str], result):
+        if on_lookup is not None:
+            on_lookup(tier)
+        return result
+
+    def __compute(self, namespace, func, args, kwargs, ttl, limit):
+        result = func(*args, **kwargs)
+        # Failed lookups are returned as None and should be retried
+        if result is not None:
+            ttl = ttl(result) if callable(ttl) else ttl
+            self.set(namespace, result, *args, ttl=ttl, limit=limit, **kwargs)
+        return result
+
+    def __call__(
+        self,
+        ttl: TTL = DEFAULT_TTL,
+        limit=DEFAULT_LIMIT,
+        namespace=None,
+        on_lookup: Optional[LookupCallback] = None
+    ):
+        def decorator(func):
+            func_namespace = namespace or f'{func.__module__}.{func.__name__}'
+
+            @wraps(func)
+            def inner(*args, **kwargs):
+                return self.get_or_set(
+                    func_namespace,
+                    func,
+                    *args,
+                    ttl=ttl,
+                    limit=limit,
+                    on_lookup=on_lookup,
+                    **kwargs
+                )
+
+            def fill(*args, **kwargs):
+                return self.fill(
+                    func_namespace,
+                    func,
+                    *args,
+                    ttl=ttl,
+                    limit=limit,
+                    on_lookup=on_lookup,
+                    **kwargs
+                )
+
+            # For batched callers: look keys up with get_many, then fill the misses
+            inner.namespace = func_namespace
+            inner.fill = fill
+            return inner
+        return decorator
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Cap the memory of the Redis the cache uses and set its eviction policy. '
+                    'Run once per Redis instance from the src directory: python cache.py'
+    )
+    parser.add_argument('--maxmemory', default=MAXMEMORY)
+    parser.add_argument('--policy', default=MAXMEMORY_POLICY, help='maxmemory-policy')
+    args = parser.parse_args()
+
+    Cache().apply_memory_policy(args.maxmemory, args.policy)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,78 +1,418 @@
-import json
+import logging
 import os
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from json.decoder import JSONDecodeError
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 import requests
 from furl import furl
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from cache import Cache
+from cache import MISSING, Cache
 from loggers.logger import Logger
+from metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES
+from store import LogStore
+from utils import LOG_COLUMNS, get_reports_key, is_finished, project_log
 
-BASE_REPORT_URL = 'https://classic.warcraftlogs.com:443/' \
-                  'v1/reports/guild/{guild}/{server}/{region}'
+# Overridable to point the client at a stand-in server, see benchmarks/fake_wcl.py
+WCL_URL = os.getenv('WCL_URL', 'https://classic.warcraftlogs.com:443')
 
-BASE_LOG_URL = 'https://classic.warcraftlogs.com:443' \
+BASE_REPORT_URL = WCL_URL + \
+                  '/v1/reports/guild/{guild}/{server}/{region}'
+
+BASE_LOG_URL = WCL_URL + \
                '/v1/report/tables/{view}/{log_id}' \
                '?end={end}&encounter={encounter}'
 
+MAX_WORKERS = 8
+POOL_SIZE = 16
+TIMEOUT = (3.05, 30)  # (connect, read) in seconds
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_BACKOFF = 60  # seconds, used when a 429 has no Retry-After
+
+REPORTS_TTL = 60 * 5
+REPORTS_MAX_STALE = 60 * 60 * 24
+LIVE_REPORTS_TTL = 60
+LIVE_LOG_TTL = 60 * 5
+# Long but finite, so Redis frees them even without an eviction policy, see Cache.apply_memory_policy
+FINISHED_LOG_TTL = 60 * 60 * 24 * 30
+L1_MAX_BYTES = 64 * 1024 * 1024
+
+# Report metadata kept in report lists and the report index
+REPORT_FIELDS = ('id', 'title', 'start', 'end', 'zone')
+
+
+def get_cache_namespace(func_name: str) -> str:
+    return f"{Path(__file__).stem}.{func_name}"
+
+
+def get_report_index(guild: str, server: str, region: str) -> str:
+    """
+    Name of the index of a guild's listed reports, see Cache.set_index.
+    """
+    return f'{get_cache_namespace("report_index")}:{get_reports_key(guild, server, region)}'
+
+
+def get_reports_ttl(reports) -> int:
+    """
+    Report lists with a report still in progress are revalidated sooner,
+    since its end keeps moving.
+    """
+    for report in reports:
+        if not is_finished(report):
+            return LIVE_REPORTS_TTL
+    return REPORTS_TTL
+
+
+def create_reports_envelope(
+    reports,
+    fetched_at: float,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+) -> Dict:
+    """
+    Cached form of a report list, with what is needed to revalidate it.
+    """
+    return {
+        'fetched_at': fetched_at,
+        'etag': etag,
+        'last_modified': last_modified,
+        'reports': reports
+    }
+
+
+def get_report_options(envelope: Dict) -> List[Dict]:
+    """
+    Dropdown options for a report list. Values are report ids, which
+    get_report_metadata resolves server-side.
+    """
+    return [
+        {
+            'label': report['title'],
+            'value': report['id'],
+            'zone': report['zone']
+        } for report in envelope['reports']
+    ]
+
+
+def get_revalidation_headers(cached: Optional[Dict]) -> Dict:
+    """
+    Headers making a report list request conditional on a cached envelope.
+    """
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+
+def get_known_reports(cached: Optional[Dict]) -> set:
+    """
+    Ids of a cached list's reports that don't need parsing again. Reports in
+    progress are parsed again since their end keeps moving.
+    """
+    return {
+        report['id'] for report in cached['reports'] if is_finished(report)
+    } if cached else set()
+
+
+def merge_reports(reports: List[Dict], cached: Optional[Dict]) -> List[Dict]:
+    """
+    Newly parsed reports merged into a cached list, newest first.
+    """
+    if not cached:
+        return reports
+    parsed = {report['id'] for report in reports}
+    return sorted(
+        reports + [report for report in cached['reports'] if report['id'] not in parsed],
+        key = lambda report: report['start'],
+        reverse = True
+    )
+
+
+def get_retry_delay(attempt: int, backoff_factor: float, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retrying a 429 or 5xx response, like the session's
+    Retry: Retry-After when upstream sends it, else exponential backoff.
+    """
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return backoff_factor * 2 ** attempt
+
+
+def get_rate_limit_backoff(retry_after: Optional[str]) -> float:
+    """
+    Seconds to hold off upstream after a 429.
+    """
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return RATE_LIMIT_BACKOFF
+
+
+def get_log_ttl(finished: bool):
+    """
+    Tables of finished reports never change and are kept for long.
+    """
+    return lambda log: FINISHED_LOG_TTL if finished else LIVE_LOG_TTL
+
+
+def parse_reports(reports, logger):
+    try:
+        return [
+            {field: report[field] for field in REPORT_FIELDS}
+            for report in reports
+        ]
+    except (NameError, TypeError) as e:
+        # Lazy %-formatting, so large payloads are only rendered if the record is emitted
+        logger.error(
+            "Got status code: %s. Response: %s", reports.get('status', None), reports
+        )
+        raise e
+
+
+def parse_log(json_response, logger):
+    if 'error' not in json_response:
+        return json_response
+    else:
+        logger.warning(
+            "Got status code %s.Response: %s", json_response.get('status', None), json_response
+        )
+
+
+def create_log_store() -> Optional[LogStore]:
+    store_path = os.getenv("LOG_STORE_PATH")
+    return LogStore(store_path) if store_path else None
+
+
+def get_projection(
+    cache: Cache,
+    store: Optional[LogStore],
+    fetch_log: Callable,
+    view: str,
+    log_id: str,
+    end: str,
+    encounter: str,
+    columns: Sequence[str],
+    finished: bool
+):
+    """
+    Projection of a report table, from the local log store, the cached full
+    table or fetch_log, in that order. Not cached in Redis itself, while
+    finished projections are written to the store.
+    """
+    if store is not None:
+        stored = store.get(view, log_id, end, encounter, columns)
+        if stored is not None:
+            return stored
+
+    # Reuse the full table if it is already cached, but don't cache it otherwise
+    log = cache.get(get_cache_namespace("_get_log"), view, log_id, end, encounter)
+    if log is MISSING:
+        log = fetch_log(view, log_id, end, encounter)
+    if not log:
+        return log
+
+    projected = project_log(log, columns)
+    if store is not None and finished and set(columns) == set(LOG_COLUMNS):
+        store.put(view, log_id, end, encounter, project_log(log))
+    return projected
+
 
 class WCLClient():
 
     def __init__(
         self,
         base_report_url: str = BASE_REPORT_URL,
-        base_log_url: str = BASE_LOG_URL
+        base_log_url: str = BASE_LOG_URL,
+        max_workers: int = MAX_WORKERS,
+        pool_size: int = POOL_SIZE,
+        timeout=TIMEOUT,
+        retries: int = RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        l1_max_bytes: int = L1_MAX_BYTES,
+        cache: Optional[Cache] = None
     ) -> None:
         self.report_url = base_report_url
         self.log_url = base_log_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.rate_limited_until = 0.0
         self.__api_key = os.getenv("API_KEY")
         self.logger = Logger().getLogger(__file__)
         self.logger.info("Initialize WCLClient.")
-        self.__cache = Cache()
+        self.__cache = cache or Cache(l1_max_bytes=l1_max_bytes)
+        self.__session = self.__create_session(pool_size, retries, backoff_factor)
+        self.__refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='reports-refresh')
+        self.__store = create_log_store()
+
+    @staticmethod
+    def __create_session(
+        pool_size: int,
+        retries: int,
+        backoff_factor: float
+    ) -> requests.Session:
+        """
+        Shared session so connections to warcraftlogs are kept alive and reused
+        between calls. 429 and 5xx responses are retried with exponential
+        backoff, honouring Retry-After when upstream sends it.
+        """
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def __request(self, url, endpoint: str, headers: Optional[Dict] = None):
+        with UPSTREAM_LATENCY.time(endpoint=endpoint) as timer:
+            response = self.__session.get(url=url, headers=headers, verify=True, timeout=self.timeout)
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+        self.logger.debug('Done. API call to %s took %s s.', endpoint, timer.elapsed)
+        if response.status_code == 429:
+            self.__set_rate_limited(response.headers.get('Retry-After'))
+        return response
+
+    def __set_rate_limited(self, retry_after: Optional[str]) -> None:
+        backoff = get_rate_limit_backoff(retry_after)
+        self.rate_limited_until = time.monotonic() + backoff
+        self.logger.warning(f"Rate limited by upstream for {backoff} s.")
 
     def __get_cache_key(self, func_name: str) -> str:
-        return f"{Path(__file__).stem}.{func_name}"
+        return get_cache_namespace(func_name)
 
     def __add_api_key(self, url: str):
         return furl(url).add({'api_key': self.__api_key})
 
-    def __parse_reports_response(self, response):
+    def __parse_reports_response(self, response, known: Optional[set] = None):
         try:
             reports = response.json()
-            try:
-                options = [
-                    {
-                        'label': report['title'],
-                        'value': json.dumps(report),
-                        'zone': report['zone']
-                    } for report in reports
-                ]
-                return options
-            except (NameError, TypeError) as e:
-                self.logger.error(
-                    f"Got status code: {reports.get('status', None)}. Response: {reports}"
-                )
-                raise e
         except JSONDecodeError as e:
-            self.logger.error(
-                f"Couldn't parse response as json: '{response.text}'"
-            )
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error("Couldn't parse response as json: '%s'", response.text)
             raise e
+        if known and isinstance(reports, list):
+            reports = [report for report in reports if report.get('id') not in known]
+        return parse_reports(reports, self.logger)
 
     def __parse_log_response(self, response):
         try:
             json_response = response.json()
-            if 'error' not in json_response:
-                return json_response
-            else:
-                self.logger.warning(
-                    f"Got status code {json_response.get('status', None)}.Response: {json_response}"
-                )
         except JSONDecodeError as e:
-            self.logger.error(f"Couldn't parse response as json: '{response.text}'")
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error("Couldn't parse response as json: '%s'", response.text)
             raise e
+        return parse_log(json_response, self.logger)
+
+    def __fetch_reports(
+        self,
+        guild: str,
+        server: str,
+        region: str,
+        cached: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Fetch a guild's report list into a cache envelope. Given a previously
+        cached envelope, the request is conditional and only reports with ids
+        not seen before are parsed and merged in.
+        """
+        url = self.report_url.format(
+            guild = guild,
+            server = server,
+            region = region
+        )
+
+        url = self.__add_api_key(url)
+
+        self.logger.debug("Requesting reports from url: %s", url)
+        response = self.__request(url, endpoint = 'reports', headers = get_revalidation_headers(cached))
+        fetched_at = time.time()
+
+        if cached and response.status_code == 304:
+            return dict(cached, fetched_at = fetched_at)
+
+        reports = self.__parse_reports_response(response, get_known_reports(cached))
+
+        return create_reports_envelope(
+            merge_reports(reports, cached),
+            fetched_at = fetched_at,
+            etag = response.headers.get('ETag'),
+            last_modified = response.headers.get('Last-Modified')
+        )
+
+    def __index_reports(self, guild: str, server: str, region: str, envelope: Dict) -> None:
+        """
+        Replace the guild's report index with the reports of its list. The
+        index expires together with the cached list.
+        """
+        self.__cache.set_index(
+            get_report_index(guild, server, region),
+            {report['id']: report for report in envelope['reports']},
+            ttl = REPORTS_MAX_STALE,
+            replace = True
+        )
+
+    def get_report_metadata(
+        self,
+        guild: str,
+        server: str,
+        region: str,
+        report_ids: List[str]
+    ) -> List[Optional[Dict]]:
+        """
+        Look up id, title, start, end and zone of reports listed by
+        get_reports for the guild. If the index lost any of them, it is rebuilt
+        from the guild's report list. Ids not in the list give None.
+        """
+        reports = self.__cache.get_index(get_report_index(guild, server, region), report_ids)
+        if all(report is not None for report in reports):
+            return reports
+
+        self.logger.info(f"Rebuilding report index of {guild}-{server}-{region}.")
+        envelope, fetched = self.__get_reports_envelope(guild, server, region)
+        listed = {report['id']: report for report in envelope['reports']}
+        # A fetched list was just indexed, and unknown ids don't need a rewrite
+        lost = any(report is None and report_id in listed for report_id, report in zip(report_ids, reports))
+        if lost and not fetched:
+            self.__index_reports(guild, server, region, envelope)
+        return [
+            report if report is not None else listed.get(report_id)
+            for report_id, report in zip(report_ids, reports)
+        ]
+
+    def __refresh_reports(self, guild: str, server: str, region: str, cached: Dict) -> None:
+        namespace = self.__get_cache_key("_get_reports")
+        key = self.__cache.get_key(namespace, guild, server, region)
+        token = self.__cache.acquire_lease(key)
+        if token is None:
+            return  # Another worker is already refreshing this list
+
+        try:
+            envelope = self.__fetch_reports(guild, server, region, cached)
+            self.__cache.set(namespace, envelope, guild, server, region, ttl = REPORTS_MAX_STALE)
+            self.__index_reports(guild, server, region, envelope)
+        except Exception:
+            self.logger.exception(f"Could not refresh reports for {guild}-{server}-{region}.")
+        finally:
+            self.__cache.release_lease(key, token)
 
     def get_reports(
         self,
@@ -80,80 +420,264 @@ class WCLClient():
         server: str,
         region: str
     ):
-        if self.__cache.key_exists(
-            self.__get_cache_key(func_name = "_get_reports"),
-            guild,
-            server,
-            region
-        ):
-            self.logger.info(
-                f"Reports for {guild}-{server}-{region} already exists, fetching from cache."
-            )
+        """
+        Report list of a guild. Lists are served stale-while-revalidate: once a
+        cached list is older than its TTL it is still returned immediately,
+        while a background refresh merges in new reports.
+        """
+        envelope, _ = self.__get_reports_envelope(guild, server, region)
+        return get_report_options(envelope)
 
-        @self.__cache(ttl = 60 * 5)
-        def _get_reports(
-            guild: str,
-            server: str,
-            region: str
-        ):
+    def __get_reports_envelope(self, guild: str, server: str, region: str) -> Tuple[Dict, bool]:
+        """
+        Cached report list envelope of a guild, see get_reports, and whether
+        it was fetched rather than served from the cache. The guild's report
+        index is rewritten whenever a list is fetched or refreshed.
+        """
+        namespace = self.__get_cache_key("_get_reports")
+        envelope = self.__cache.get(namespace, guild, server, region)
 
-            url = self.report_url.format(
-                guild = guild,
-                server = server,
-                region = region
+        if envelope is MISSING:
+            envelope = self.__cache.fill(
+                namespace,
+                self.__fetch_reports,
+                guild,
+                server,
+                region,
+                ttl = REPORTS_MAX_STALE
             )
+            self.__index_reports(guild, server, region, envelope)
+            return envelope, True
+
+        self.logger.info(
+            f"Reports for {guild}-{server}-{region} already exists, fetching from cache."
+        )
+        if time.time() - envelope['fetched_at'] > get_reports_ttl(envelope['reports']):
+            self.logger.info(f"Refreshing reports for {guild}-{server}-{region} in the background.")
+            self.__refresher.submit(self.__refresh_reports, guild, server, region, envelope)
 
-            url = self.__add_api_key(url)
+        return envelope, False
 
-            self.logger.debug(f"Requesting reports from url: {url}")
-            t0 = time.time()
-            response = requests.get(url=url, verify=True)
-            t1 = time.time()
-            self.logger.debug('Done. API call for fetching reports took {} s.'.format(t1 - t0))
+    def __fetch_log(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str
+    ):
+        url = self.log_url.format(
+            view = view,
+            log_id = log_id,
+            end = end,
+            encounter = encounter
+        )
+
+        url = self.__add_api_key(url)
+
+        self.logger.debug("Fetching logs from url: %s", url)
+        response = self.__request(url, endpoint = 'tables')
+
+        return self.__parse_log_response(response)
+
+    def __log_lookup(self, description: str):
+        """
+        Cache lookup callback logging where a value was served from.
+        """
+        def on_lookup(tier: Optional[str]) -> None:
+            if tier is None:
+                self.logger.info(f"{description} not cached, fetched it.")
+            else:
+                self.logger.info(f"{description} already exists, fetched from cache ({tier}).")
+        return on_lookup
 
-            return self.__parse_reports_response(response)
+    def __get_log_call(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str,
+        columns: Optional[Sequence[str]] = None,
+        finished: bool = False
+    ) -> Tuple[Callable, tuple]:
+        """
+        The cached function behind get_log and the arguments to call it with.
+        """
+        on_lookup = self.__log_lookup(f"Log {log_id}")
+
+        if columns:
+            @self.__cache(
+                ttl = get_log_ttl(finished),
+                namespace = self.__get_cache_key("_get_log_columns"),
+                on_lookup = on_lookup
+            )
+            def _get_log_columns(
+                view: str,
+                log_id: str,
+                end: str,
+                encounter: str,
+                columns: List[str]
+            ):
+                return self.__get_projection(view, log_id, end, encounter, columns, finished)
+
+            return _get_log_columns, (view, log_id, end, encounter, list(columns))
+
+        @self.__cache(
+            ttl = get_log_ttl(finished),
+            namespace = self.__get_cache_key("_get_log"),
+            on_lookup = on_lookup
+        )
+        def _get_log(
+            view: str,
+            log_id: str,
+            end: str,
+            encounter: str
+        ):
+            return self.__fetch_log(view, log_id, end, encounter)
 
-        return _get_reports(guild, server, region)
+        return _get_log, (view, log_id, end, encounter)
 
     def get_log(
         self,
         view: str,
         log_id: str,
         end: str,
-        encounter: str
+        encounter: str,
+        columns: Optional[Sequence[str]] = None,
+        finished: bool = False
     ):
-        if self.__cache.key_exists(
-            self.__get_cache_key(func_name = "_get_log"),
-            view,
-            log_id,
-            end,
-            encounter
-        ):
-            self.logger.info(f"Log {log_id} already exists, fetching from cache.")
+        """
+        Fetch a report table. With columns given, only a columnar projection of
+        those entry fields is fetched and cached, see utils.project_log.
+        Projections of finished reports are also kept in the local log store,
+        which is checked before going upstream.
+        Tables are only kept for FINISHED_LOG_TTL when finished is passed, see
+        utils.is_finished.
+        """
+        function, args = self.__get_log_call(view, log_id, end, encounter, columns, finished)
+        return function(*args)
 
-        @self.__cache()
-        def _get_log(
+    def __get_projection(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str,
+        columns: Sequence[str],
+        finished: bool
+    ):
+        return get_projection(
+            self.__cache, self.__store, self.__fetch_log, view, log_id, end, encounter, columns, finished
+        )
+
+    def cache_stats(self) -> dict:
+        return self.__cache.stats()
+
+    def __get_contribution_call(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str,
+        finished: bool = False
+    ) -> Tuple[Callable, tuple]:
+        """
+        The cached function behind get_contribution and the arguments to call
+        it with.
+        """
+        @self.__cache(
+            ttl = get_log_ttl(finished),
+            namespace = self.__get_cache_key("_get_contribution"),
+            on_lookup = self.__log_lookup(f"Contribution of log {log_id}")
+        )
+        def _get_contribution(
             view: str,
             log_id: str,
             end: str,
             encounter: str
         ):
+            log = self.__get_projection(view, log_id, end, encounter, LOG_COLUMNS, finished)
+            if not log:
+                return None  # Failed fetch, not cached so it is retried
+            if not log.get('entries', None):
+                return {'name': [], 'type': [], 'share': []}
 
-            url = self.log_url.format(
-                view = view,
-                log_id = log_id,
-                end = end,
-                encounter = encounter
-            )
+            from aggregation import normalize_log
+
+            names, classes, shares = normalize_log(log)
+            return {
+                'name': names.tolist(),
+                'type': classes.tolist(),
+                'share': shares.tolist()
+            }
+
+        return _get_contribution, (view, log_id, end, encounter)
+
+    def get_contribution(
+        self,
+        view: str,
+        log_id: str,
+        end: str,
+        encounter: str,
+        finished: bool = False
+    ):
+        """
+        Each player's name, class and share of the total in a report table,
+        cached so averaging a selection only combines precomputed vectors.
+        A table without entries gives empty vectors, which are cached like any
+        other, while a failed fetch gives None. The projection it is computed
+        from is not cached as well, only kept in the log store.
+        """
+        function, args = self.__get_contribution_call(view, log_id, end, encounter, finished)
+        return function(*args)
+
+    def __map(self, func, log_requests: List[Dict], max_workers: Optional[int] = None):
+        if not log_requests:
+            return []
+
+        max_workers = min(max_workers or self.max_workers, len(log_requests))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(func, **request) for request in log_requests]
+            return [future.result() for future in futures]
+
+    def __map_cached(self, get_call, log_requests: List[Dict], max_workers: Optional[int] = None):
+        """
+        Resolve the requests' cache hits with one batched lookup per namespace,
+        then compute the misses concurrently without looking them up again.
+        """
+        calls = [get_call(**request) for request in log_requests]
+        results = [MISSING] * len(calls)
+
+        namespaces = defaultdict(list)
+        for index, (function, args) in enumerate(calls):
+            namespaces[function.namespace].append((index, args))
+
+        for namespace, entries in namespaces.items():
+            cached = self.__cache.get_many(namespace, [args for _, args in entries])
+            for (index, _), result in zip(entries, cached):
+                results[index] = result
 
-            url = self.__add_api_key(url)
+        misses = [index for index, result in enumerate(results) if result is MISSING]
+        self.logger.info(f"{len(log_requests) - len(misses)} of {len(log_requests)} requests found in cache.")
+        fetched = self.__map(
+            lambda function, args: function.fill(*args),
+            [{'function': calls[index][0], 'args': calls[index][1]} for index in misses],
+            max_workers
+        )
+        for index, result in zip(misses, fetched):
+            results[index] = result
 
-            self.logger.debug(f"Fetching logs from url: {url}")
-            t0 = time.time()
-            response = requests.get(url=url, verify=True)
-            t1 = time.time()
-            self.logger.debug('Done API call for fetching logs. Took {} s.'.format(t1 - t0))
+        return results
 
-            return self.__parse_log_response(response)
+    def get_logs(self, log_requests: List[Dict], max_workers: Optional[int] = None):
+        """
+        Fetch several logs concurrently. Each request holds the keyword
+        arguments of get_log. Results are returned in input order.
+        """
+        return self.__map_cached(self.__get_log_call, log_requests, max_workers)
 
-        return _get_log(view, log_id, end, encounter)
+    def get_contributions(self, log_requests: List[Dict], max_workers: Optional[int] = None):
+        """
+        Concurrent counterpart of get_contribution, see get_logs.
+        """
+        return self.__map_cached(self.__get_contribution_call, log_requests, max_workers)
@@ -0,0 +1,52 @@
+"""
+Loads the YAML configs once per process and builds the lookups and dropdown
+options derived from them. Option tuples are shared and must not be mutated.
+"""
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+import yaml
+
+CONFIG_DIR = 'configs'
+
+# The C loader is much faster, but only available when PyYAML was built with libyaml
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def load_yaml(file_name: str):
+    with open(os.path.join(CONFIG_DIR, file_name)) as file:
+        return yaml.load(file, Loader=Loader)
+
+
+ZONES = MappingProxyType(load_yaml('zone_settings.yaml'))
+CLASSES = MappingProxyType(load_yaml('class_settings.yaml'))
+SERVERS = tuple(load_yaml('servers.yaml'))
+
+ENCOUNTERS_BY_ZONE = MappingProxyType({
+    zone['id']: tuple(zone['encounters']) for zone in ZONES.values()
+})
+CLASS_COLORS = MappingProxyType({
+    class_: settings['color'] for class_, settings in CLASSES.items()
+})
+
+ZONE_OPTIONS = tuple({'label': zone, 'value': settings['id']} for zone, settings in ZONES.items())
+CLASS_OPTIONS = tuple({'label': class_, 'value': class_} for class_ in CLASSES)
+
+
+@lru_cache(maxsize=None)
+def get_encounter_options(zone_id) -> tuple:
+    return tuple(
+        {
+            'label': encounter['name'],
+            'value': encounter['id']
+        } for encounter in ENCOUNTERS_BY_ZONE.get(zone_id, ())
+    )
+
+
+def load_users():
+    return load_yaml('users.yaml')
+
+
+def load_guilds(file_name: str = 'guilds.yaml'):
+    return load_yaml(file_name)
@@ -1,20 +1,11 @@
-import yaml
 import dash_html_components as html
 import dash_core_components as dcc
+from config import CLASS_OPTIONS, SERVERS, ZONE_OPTIONS
 from loggers.logger import Logger
 
 # Initialize logger
 logger = Logger().getLogger(__file__)
 
-with open(r'configs/zone_settings.yaml') as file:
-    zones = yaml.load(file, Loader=yaml.FullLoader)
-
-with open(r'configs/class_settings.yaml') as file:
-    classes = yaml.load(file, Loader=yaml.FullLoader)
-
-with open(r'configs/servers.yaml') as file:
-    servers = yaml.load(file, Loader=yaml.FullLoader)
-
 serverRegion_div = html.Div(
     className='row',
     children=[
@@ -23,7 +14,7 @@ serverRegion_div = html.Div(
             children=[
                 html.Datalist(
                     id='serverlist',
-                    children=[html.Option(value=server) for server in servers]
+                    children=[html.Option(value=server) for server in SERVERS]
                 ),
                 dcc.Input(
                     type='text',
@@ -68,7 +59,7 @@ guildZone_div = html.Div(
             children=[
                 dcc.Dropdown(
                     id='zoneselect',
-                    options=[{'label': zone, 'value': zones[zone]['id']} for zone in zones],
+                    options=list(ZONE_OPTIONS),
                     placeholder='Zone'
                 )
             ]
@@ -115,7 +106,7 @@ reports_select_div = html.Div(
                 html.H3('Filters'),
                 dcc.Dropdown(
                     id='classdropdown',
-                    options=[{'label': class_, 'value': class_} for class_ in classes],
+                    options=list(CLASS_OPTIONS),
                     placeholder='Class',
                     multi=True
                 ),
@@ -0,0 +1,133 @@
+"""
+Periodically pre-populates the cache with the damage and healing tables of
+new reports for the guilds in configs/guilds.yaml, see
+configs/templates/guilds_template.yaml. Run from the src directory:
+
+    python ingest.py [--once] [--interval SECONDS]
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv, find_dotenv
+
+from cache import MISSING, Cache
+from client import WCLClient
+from config import load_guilds
+from loggers.logger import Logger
+from utils import get_reports_key, is_finished
+
+GUILDS_CONFIG = 'guilds.yaml'
+INTERVAL = 60 * 10
+VIEWS = ('damage-done', 'healing')
+HIGH_WATER_MARK_NAMESPACE = 'ingest.high_water_mark'
+
+logger = Logger().getLogger(__file__)
+
+
+class Ingester():
+    def __init__(self, client: WCLClient, cache: Cache) -> None:
+        self.__client = client
+        self.__cache = cache
+
+    def get_high_water_mark(self, guild_key: str) -> int:
+        high_water_mark = self.__cache.get(HIGH_WATER_MARK_NAMESPACE, guild_key)
+        return 0 if high_water_mark is MISSING else high_water_mark
+
+    def set_high_water_mark(self, guild_key: str, high_water_mark: int) -> None:
+        self.__cache.set(HIGH_WATER_MARK_NAMESPACE, high_water_mark, guild_key, ttl=0, limit=0)
+
+    def ingest_guild(self, guild: str, server: str, region: str) -> int:
+        """
+        Fetch the tables of every report started after the guild's high-water
+        mark and advance the mark past them. The mark only moves over finished
+        reports whose tables were all fetched, so failures and reports still in
+        progress are retried on the next run. Returns the number of ingested
+        reports.
+        """
+        guild_key = get_reports_key(guild, server, region)
+        high_water_mark = self.get_high_water_mark(guild_key)
+
+        reports = self.__client.get_report_metadata(
+            guild,
+            server,
+            region,
+            [report_option['value'] for report_option in self.__client.get_reports(guild, server, region)]
+        )
+        reports = sorted(
+            (report for report in reports if report and report['start'] > high_water_mark),
+            key=lambda report: report['start']
+        )
+
+        if not reports:
+            logger.info(f"No new reports for {guild_key}.")
+            return 0
+
+        logger.info(f"Ingesting {len(reports)} new reports for {guild_key}.")
+        results = self.__client.get_logs(
+            [
+                {
+                    'view': view,
+                    'log_id': report['id'],
+                    'end': report['end'] - report['start'],
+                    'encounter': '',
+                    'finished': is_finished(report)
+                } for report in reports for view in VIEWS
+            ]
+        )
+
+        ingested = 0
+        for report, logs in zip(reports, zip(*[iter(results)] * len(VIEWS))):
+            if not all(logs):
+                logger.warning(f"Could not ingest report {report['id']}, retrying next run.")
+                break
+            self.__client.get_contributions(
+                [
+                    {
+                        'view': view,
+                        'log_id': report['id'],
+                        'end': report['end'] - report['start'],
+                        'encounter': '',
+                        'finished': is_finished(report)
+                    } for view in VIEWS
+                ]
+            )
+            # Its end, and with it its cache keys, changes until the report is finished
+            if not is_finished(report):
+                logger.info(f"Report {report['id']} is still in progress, retrying next run.")
+                break
+            high_water_mark = report['start']
+            ingested += 1
+
+        self.set_high_water_mark(guild_key, high_water_mark)
+        return ingested
+
+    def ingest(self, guilds) -> None:
+        for guild in guilds.values():
+            try:
+                self.ingest_guild(guild['guild'], guild['server'], guild['region'])
+            except Exception:
+                logger.exception(f"Ingestion failed for {guild}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', default=GUILDS_CONFIG, help='guilds to ingest, relative to configs/')
+    parser.add_argument('--interval', type=int, default=INTERVAL, help='seconds between runs')
+    parser.add_argument('--once', action='store_true', help='run a single ingestion and exit')
+    args = parser.parse_args()
+
+    load_dotenv(find_dotenv())
+    client = WCLClient()
+    ingester = Ingester(client, Cache())
+
+    while True:
+        t0 = time.time()
+        ingester.ingest(load_guilds(args.config))
+        logger.info('Ingestion run took {} s.'.format(time.time() - t0))
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
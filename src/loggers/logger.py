@@ -1,27 +1,45 @@
 import logging
 import logging.config
 import os
+import threading
 from pathlib import Path
-from flask import request
+from flask import g, has_request_context, request
 from typing import Optional
 
 import yaml
 
 LOGGING_CONFIG = os.path.join(os.getcwd(), "configs/logger.yml")
 
+_config = None
+_config_lock = threading.Lock()
+
+
+def configure_logging():
+    """
+    Apply the logging config once per process and return it. Re-applying it
+    on every Logger() would replace handlers on each call.
+    """
+    global _config
+    with _config_lock:
+        if _config is None:
+            with open(LOGGING_CONFIG, 'r') as stream:
+                config = yaml.safe_load(stream)
+            logging.config.dictConfig(config)
+            _config = config
+    return _config
+
 
 class Logger():
     def __init__(self):
-        with open(LOGGING_CONFIG, 'r') as stream:
-            self.config = yaml.safe_load(stream)
-        logging.config.dictConfig(self.config)
+        self.config = configure_logging()
 
     def getLogger(self, logger_name: str, log_level: Optional[str] = None):
         logger = logging.getLogger(Path(logger_name).stem)
         if log_level:
             logger.setLevel(log_level)
-        filt = UserFilter()
-        logger.addFilter(filt)
+        # Loggers are shared per name, so only attach the filter once
+        if not any(isinstance(filt, UserFilter) for filt in logger.filters):
+            logger.addFilter(UserFilter())
         return logger
 
 
@@ -31,10 +49,20 @@ class UserFilter(logging.Filter):
     """
 
     def filter(self, record):
-        try:
-            user = request.authorization['username']
-        except RuntimeError:
-            user = None
-        user = "Not yet authorized user" if user is None else str(user)
-        record.user = user
+        user = get_request_user()
+        record.user = "Not yet authorized user" if user is None else str(user)
         return True
+
+
+def get_request_user() -> Optional[str]:
+    """
+    Basic auth user of the current request, or None outside of requests.
+    Parsing the Authorization header is done once per request and the result
+    kept on flask.g.
+    """
+    if not has_request_context():
+        return None
+    if 'log_user' not in g:
+        authorization = request.authorization
+        g.log_user = authorization['username'] if authorization else None
+    return g.log_user
@@ -0,0 +1,199 @@
+"""
+In-process metrics rendered in the Prometheus text format. Every gunicorn
+worker keeps its own values, so scrape each worker or aggregate by instance.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds, tuned for Redis round trips up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric():
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], *extra: Tuple[str, str]) -> str:
+        return format_labels(list(zip(self.labelnames, key)) + list(extra))
+
+    def render(self) -> List[str]:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}'
+        ] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.__values = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.__values[key] += amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self.__values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self.__values.items())
+        return [f'{self.name}_total{self._labels(key)} {value}' for key, value in values]
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self.__counts = {}
+        self.__sums = defaultdict(float)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self.__counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect_left(self.buckets, value)] += 1
+            self.__sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the block on the monotonic clock. The yielded
+        timer's elapsed attribute holds it once the block exits.
+        """
+        timer = Timer()
+        try:
+            yield timer
+        finally:
+            timer.stop()
+            self.observe(timer.elapsed, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(self.__counts.get(self._key(labels), ()))
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), self.__sums[key]) for key, counts in self.__counts.items())
+
+        samples = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                samples.append(f'{self.name}_bucket{self._labels(key, ("le", le))} {cumulative}')
+            samples.append(f'{self.name}_sum{self._labels(key)} {total}')
+            samples.append(f'{self.name}_count{self._labels(key)} {cumulative}')
+        return samples
+
+
+class Timer():
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def stop(self) -> float:
+        self.elapsed = time.perf_counter() - self.start
+        return self.elapsed
+
+
+class Registry():
+    def __init__(self) -> None:
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+
+    def __register(self, metric_class, name: str, *args, **kwargs):
+        with self.__lock:
+            if name not in self.__metrics:
+                self.__metrics[name] = metric_class(name, *args, **kwargs)
+            return self.__metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.__register(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.__register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+
+REGISTRY = Registry()
+
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    'wcl_upstream_request_seconds',
+    'Latency of requests to warcraftlogs, including retries.',
+    ['endpoint']
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    'wcl_upstream_responses',
+    'Responses from warcraftlogs by status code.',
+    ['endpoint', 'status']
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'wcl_cache_lookups',
+    'Cache lookups by tier (l1 in-process, l2 Redis) and result.',
+    ['tier', 'result']
+)
+REDIS_LATENCY = REGISTRY.histogram(
+    'wcl_redis_seconds',
+    'Latency of Redis round trips made by the cache.',
+    ['operation']
+)
+REDIS_ERRORS = REGISTRY.counter(
+    'wcl_redis_errors',
+    'Redis calls that failed, because Redis was unreachable (after which the cache is bypassed for a '
+    'while), the connection pool was exhausted or Redis answered with an error (only that call is skipped).',
+    ['operation', 'reason']
+)
+AVERAGE_LATENCY = REGISTRY.histogram(
+    'wcl_average_seconds',
+    'Time spent fetching contributions and averaging a report selection.',
+    ['stage']
+)
+FIGURE_LATENCY = REGISTRY.histogram(
+    'wcl_figure_build_seconds',
+    'Time spent filtering and building the graph figure.'
+)
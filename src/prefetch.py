@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from loggers.logger import Logger
+
+MAX_WORKERS = 2
+MIN_INTERVAL = 0.25  # seconds between prefetch requests
+
+
+class Prefetcher():
+    """
+    Warms the cache in the background for reports a user is likely to pick
+    next. Jobs are grouped per owner, so a new schedule or a cancel only
+    drops that owner's pending work. Requests are spaced by min_interval and
+    paused while the client is rate limited, so interactive requests keep
+    priority on the upstream quota.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_workers: int = MAX_WORKERS,
+        min_interval: float = MIN_INTERVAL
+    ) -> None:
+        self.min_interval = min_interval
+        self.__client = client
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self.__jobs = {}
+        self.__lock = threading.Lock()
+        self.__next_request = 0.0
+        self.__logger = Logger().getLogger(__file__)
+
+    def schedule(self, owner: str, requests: List[Dict]) -> None:
+        """
+        Replace the owner's pending prefetch with get_contribution requests.
+        """
+        cancelled = threading.Event()
+        futures = [self.__executor.submit(self.__run, cancelled, request) for request in requests]
+        with self.__lock:
+            previous = self.__jobs.get(owner)
+            self.__jobs[owner] = (cancelled, futures)
+        if previous:
+            self.__cancel(*previous)
+        self.__logger.info(f"Scheduled prefetch of {len(requests)} logs.")
+
+    def cancel(self, owner: str) -> None:
+        with self.__lock:
+            job = self.__jobs.pop(owner, None)
+        if job:
+            self.__cancel(*job)
+            self.__logger.info("Cancelled prefetch.")
+
+    @staticmethod
+    def __cancel(cancelled: threading.Event, futures) -> None:
+        cancelled.set()
+        for future in futures:
+            future.cancel()
+
+    def __wait_turn(self, cancelled: threading.Event) -> bool:
+        while not cancelled.is_set():
+            with self.__lock:
+                now = time.monotonic()
+                start = max(self.__next_request, self.__client.rate_limited_until)
+                if now >= start:
+                    self.__next_request = now + self.min_interval
+                    return True
+            cancelled.wait(start - now)
+        return False
+
+    def __run(self, cancelled: threading.Event, request: Dict) -> None:
+        if not self.__wait_turn(cancelled):
+            return
+        try:
+            self.__client.get_contribution(**request)
+        except Exception:
+            # Nobody reads the futures, so failures are only seen here
+            self.__logger.exception(f"Prefetch of log {request.get('log_id')} failed.")
@@ -0,0 +1,102 @@
+import json
+import pickle
+import threading
+import zlib
+from typing import Tuple
+
+try:
+    import lz4.frame as lz4
+except ImportError:  # lz4 is optional
+    lz4 = None
+
+# Encoded values start with MAGIC, a format version and the codec and
+# compression ids they were written with, so entries stay readable after the
+# configured serializer changes. Values without MAGIC are legacy plain JSON.
+MAGIC = b'\x00WCL'
+VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+CODECS = {
+    'json': (1, lambda value: json.dumps(value, separators=(',', ':')).encode(), json.loads),
+    'pickle': (2, lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads)
+}
+
+COMPRESSIONS = {
+    'none': (0, bytes, bytes),
+    'zlib': (1, lambda data: zlib.compress(data, 6), zlib.decompress)
+}
+
+if lz4 is not None:
+    COMPRESSIONS['lz4'] = (2, lz4.compress, lz4.decompress)
+
+CODECS_BY_ID = {codec_id: loads for codec_id, _, loads in CODECS.values()}
+COMPRESSIONS_BY_ID = {compression_id: decompress for compression_id, _, decompress in COMPRESSIONS.values()}
+
+
+class SerializationError(ValueError):
+    pass
+
+
+class Serializer():
+    """
+    Encodes cache values as tagged, optionally compressed bytes and keeps a
+    running compression ratio. Pickle should only be used when Redis is not
+    reachable by untrusted clients.
+    """
+
+    def __init__(self, codec: str = 'json', compression: str = 'zlib') -> None:
+        if codec not in CODECS:
+            raise SerializationError(f"Unknown codec '{codec}'.")
+        if compression not in COMPRESSIONS:
+            raise SerializationError(f"Unknown or unavailable compression '{compression}'.")
+        self.codec = codec
+        self.compression = compression
+        self.__raw_bytes = 0
+        self.__encoded_bytes = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def compression_ratio(self) -> float:
+        with self.__lock:
+            return self.__raw_bytes / self.__encoded_bytes if self.__encoded_bytes else 1.0
+
+    def encode(self, value) -> Tuple[bytes, int]:
+        """
+        Return the encoded value and its uncompressed size in bytes.
+        """
+        codec_id, dumps, _ = CODECS[self.codec]
+        compression_id, compress, _ = COMPRESSIONS[self.compression]
+
+        raw = dumps(value)
+        data = MAGIC + bytes([VERSION, codec_id, compression_id]) + compress(raw)
+
+        with self.__lock:
+            self.__raw_bytes += len(raw)
+            self.__encoded_bytes += len(data)
+
+        return data, len(raw)
+
+    def decode(self, data: bytes):
+        """
+        Return the decoded value and its uncompressed size in bytes. Raises
+        SerializationError for any entry that can't be read.
+        """
+        if not data.startswith(MAGIC):
+            try:
+                return json.loads(data), len(data)
+            except ValueError as e:
+                raise SerializationError("Unreadable legacy cache entry.") from e
+
+        version, codec_id, compression_id = data[len(MAGIC):HEADER_SIZE]
+        if version != VERSION or codec_id not in CODECS_BY_ID or compression_id not in COMPRESSIONS_BY_ID:
+            raise SerializationError(
+                f"Unsupported cache entry (version {version}, codec {codec_id}, compression {compression_id})."
+            )
+
+        # Corrupt or truncated bodies fail in codec-specific ways, e.g. zlib.error,
+        # JSONDecodeError or UnpicklingError
+        try:
+            raw = COMPRESSIONS_BY_ID[compression_id](data[HEADER_SIZE:])
+            return CODECS_BY_ID[codec_id](raw), len(raw)
+        except Exception as e:
+            raise SerializationError("Unreadable cache entry.") from e
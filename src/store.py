@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from typing import Optional, Sequence
+
+from loggers.logger import Logger
+from utils import LOG_COLUMNS
+
+MMAP_SIZE = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    log_id TEXT NOT NULL,
+    view TEXT NOT NULL,
+    encounter TEXT NOT NULL,
+    end_time INTEGER NOT NULL,
+    PRIMARY KEY (log_id, view, encounter, end_time)
+);
+CREATE TABLE IF NOT EXISTS log_entries (
+    log_id TEXT NOT NULL,
+    view TEXT NOT NULL,
+    encounter TEXT NOT NULL,
+    end_time INTEGER NOT NULL,
+    name TEXT,
+    type TEXT,
+    total REAL
+);
+CREATE INDEX IF NOT EXISTS log_entries_key ON log_entries (log_id, view, encounter, end_time);
+"""
+
+
+class LogStore():
+    """
+    Durable SQLite store of finished reports' projected tables, keyed by
+    report id, view, encounter and end. Finished reports never change, so
+    entries never expire. Reads only select the requested columns, and the
+    database file is memory-mapped.
+    """
+
+    def __init__(self, path: str, mmap_size: int = MMAP_SIZE) -> None:
+        self.path = path
+        self.mmap_size = mmap_size
+        self.__local = threading.local()
+        self.__logger = Logger().getLogger(__file__)
+        self.__logger.info(f"Initialize LogStore at {path}.")
+        with self.__connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def __connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            self.__local.connection = connection
+        return connection
+
+    @staticmethod
+    def __key(view: str, log_id: str, end, encounter) -> tuple:
+        return (str(log_id), view, str(encounter), int(end))
+
+    def get(
+        self,
+        view: str,
+        log_id: str,
+        end,
+        encounter,
+        columns: Sequence[str] = LOG_COLUMNS
+    ) -> Optional[dict]:
+        """
+        Return the stored projection in the format of utils.project_log, or
+        None if the log is not stored.
+        """
+        if not set(columns) <= set(LOG_COLUMNS):
+            return None
+
+        key = self.__key(view, log_id, end, encounter)
+        connection = self.__connection()
+
+        stored = connection.execute(
+            'SELECT 1 FROM logs WHERE log_id = ? AND view = ? AND encounter = ? AND end_time = ?',
+            key
+        ).fetchone()
+        if stored is None:
+            return None
+
+        rows = connection.execute(
+            f'SELECT {", ".join(columns)} FROM log_entries '
+            'WHERE log_id = ? AND view = ? AND encounter = ? AND end_time = ? ORDER BY rowid',
+            key
+        ).fetchall()
+
+        if not rows:
+            return {'entries': {}}
+        return {'entries': dict(zip(columns, map(list, zip(*rows))))}
+
+    def put(self, view: str, log_id: str, end, encounter, log: dict) -> None:
+        """
+        Store a projection in the format of utils.project_log.
+        """
+        key = self.__key(view, log_id, end, encounter)
+        entries = log.get('entries') or {}
+        rows = zip(*[entries.get(column, []) for column in LOG_COLUMNS]) if entries else []
+
+        with self.__connection() as connection:
+            connection.execute(
+                'DELETE FROM log_entries WHERE log_id = ? AND view = ? AND encounter = ? AND end_time = ?',
+                key
+            )
+            connection.executemany(
+                'INSERT INTO log_entries (log_id, view, encounter, end_time, name, type, total) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key + tuple(row) for row in rows)
+            )
+            connection.execute('INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?)', key)
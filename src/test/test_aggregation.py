@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from aggregation import AggregateView, LogAverager, normalize_log
+
+FIRST_LOG = {
+    "entries": [
+        {"name": "Lucas", "type": "Warrior", "total": 300},
+        {"name": "Anna", "type": "Mage", "total": 100},
+        {"name": "Wolf", "type": "Pet", "total": 1000}
+    ]
+}
+
+SECOND_LOG = {
+    "entries": {
+        "name": ["Lucas", "Anna", "Eve"],
+        "type": ["Warrior", "Mage", "Priest"],
+        "total": [100, 200, 100]
+    }
+}
+
+
+def test_normalize_log_should_drop_pets():
+    names, classes, normalized = normalize_log(FIRST_LOG)
+    assert list(names) == ["Lucas", "Anna"]
+    assert list(classes) == ["Warrior", "Mage"]
+    assert list(normalized) == [75.0, 25.0]
+
+
+def test_log_averager():
+    averager = LogAverager()
+    averager.add_log(FIRST_LOG)
+    averager.add_log(SECOND_LOG)
+
+    df = averager.result()
+
+    assert list(df.columns) == ["_std", "_avg", "_counts", "_class"]
+    assert df.index.name == "name"
+    assert list(df.index) == ["Eve", "Anna", "Lucas"]
+    assert list(df._counts) == [1, 2, 2]
+    assert list(df._class) == ["Priest", "Mage", "Warrior"]
+    assert df.loc["Lucas", "_avg"] == pytest.approx(50.0)
+    assert df.loc["Lucas", "_std"] == pytest.approx(np.std([75.0, 25.0]))
+    assert df.loc["Eve", "_std"] == 0
+
+
+def test_aggregate_view_should_filter_classes_and_irrelevant_roles():
+    averager = LogAverager()
+    averager.add_normalized(
+        ["Lucas", "Anna", "Eve", "Tom"],
+        ["Warrior", "Mage", "Mage", "Priest"],
+        [60.0, 30.0, 2.0, 8.0]
+    )
+    view = AggregateView(averager.result(), threshold=0.1)
+
+    assert list(view.select().index) == ["Tom", "Anna", "Lucas"]
+    assert list(view.select(["Mage"]).index) == ["Anna"]
+    assert list(view.select(["Mage", "Priest"]).index) == ["Tom", "Anna"]
+    assert view.select(["Druid"]).empty
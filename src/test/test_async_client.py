@@ -0,0 +1,86 @@
+import os
+
+from testcontainers.compose import DockerCompose
+
+from async_client import AsyncWCLClient
+from benchmarks.fake_wcl import FakeWCLServer
+from benchmarks.synthetic import generate_log, generate_reports
+from cache import Cache
+from metrics import UPSTREAM_RESPONSES
+from utils import LOG_COLUMNS, project_log
+
+REDIS_PORT = 6379
+
+
+def create_client(compose, fake) -> AsyncWCLClient:
+    host = compose.get_service_host("redis-cache-test", REDIS_PORT)
+    port = compose.get_service_port("redis-cache-test", REDIS_PORT)
+
+    return AsyncWCLClient(
+        base_report_url=fake.url + '/v1/reports/guild/{guild}/{server}/{region}',
+        base_log_url=fake.url + '/v1/report/tables/{view}/{log_id}?end={end}&encounter={encounter}',
+        cache=Cache(host, port)
+    )
+
+
+def test_should_get_reports_sync():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose, FakeWCLServer(report_count=3) as fake:
+        client = create_client(compose, fake)
+
+        expected = [report['id'] for report in generate_reports("sugar", 3)]
+
+        for _ in range(2):
+            report_options = client.get_reports_sync("sugar", "firemaw", "EU")
+            assert [report_option['value'] for report_option in report_options] == expected
+
+        assert fake.requests == 1
+
+
+def test_should_get_logs_sync():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose, FakeWCLServer() as fake:
+        client = create_client(compose, fake)
+
+        requests = [
+            {
+                'view': 'damage-done',
+                'log_id': log_id,
+                'end': 1000,
+                'encounter': '',
+                'columns': LOG_COLUMNS,
+                'finished': finished
+            } for log_id, finished in (('a', True), ('b', False))
+        ]
+
+        for _ in range(2):
+            logs = client.get_logs_sync(requests)
+            assert logs == [project_log(generate_log('a')), project_log(generate_log('b'))]
+
+        assert fake.requests == 2
+
+
+def test_should_retry_rate_limited_requests():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose, FakeWCLServer(rate_limit=1) as fake:
+        client = create_client(compose, fake)
+
+        requests = [
+            {'view': 'damage-done', 'log_id': log_id, 'end': 1000, 'encounter': ''}
+            for log_id in ('a', 'b', 'c')
+        ]
+
+        logs = client.get_logs_sync(requests)
+
+        assert logs == [generate_log(log_id) for log_id in ('a', 'b', 'c')]
+        assert fake.rate_limited >= 1
+        assert UPSTREAM_RESPONSES.value(endpoint='tables', status=429) == fake.rate_limited
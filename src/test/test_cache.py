@@ -1,9 +1,12 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
+from redis.exceptions import ResponseError
 from testcontainers.compose import DockerCompose
 
-from cache import Cache
+from cache import MISSING, Cache, LocalCache
 
 REDIS_PORT = 6379
 
@@ -143,3 +146,246 @@ def test_should_evict_least_accessed():
 
         diff = set(keys) - set(cache.get_all_keys())
         assert diff == set([keys[0]])
+
+
+def test_should_coalesce_concurrent_misses():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        cache = Cache(host, port)
+
+        namespace = "coalesce-misses"
+        calls = []
+
+        @cache(namespace=namespace)
+        def test_func(test_input: int):
+            calls.append(test_input)
+            time.sleep(0.5)
+            return test_input
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(test_func, [1] * 5))
+
+        assert results == [1] * 5
+        assert calls == [1]
+        # Waiters count as hits once, however often they poll
+        assert cache.stats()['l2']['hits'] == 4
+        assert cache.stats()['l2']['misses'] == 1
+
+
+def test_local_cache_should_evict_least_recently_used_by_size():
+    local = LocalCache(max_bytes=10)
+
+    local.set("a", "first", size=4)
+    local.set("b", "second", size=4)
+    local.get("a")
+    local.set("c", "third", size=4)
+
+    assert local.get("b") is MISSING
+    assert local.get("a") == "first"
+    assert local.get("c") == "third"
+    assert local.size == 8
+
+
+def test_local_cache_should_expire_entries():
+    local = LocalCache(max_bytes=10, ttl=60)
+
+    local.set("a", "first", size=1, ttl=0.1)
+    assert local.get("a") == "first"
+
+    time.sleep(0.15)
+
+    assert local.get("a") is MISSING
+    assert local.size == 0
+
+
+def test_should_apply_ttl_policy_to_result():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        cache = Cache(host, port)
+
+        namespace = "ttl-policy-test"
+
+        @cache(namespace=namespace, ttl=lambda result: 1 if result == "live" else 0)
+        def test_func(test_input: str):
+            return test_input
+
+        test_func("live")
+        test_func("finished")
+
+        time.sleep(1.1)
+
+        assert_key_exists(cache, namespace, ["live"], exists = False)
+        assert_key_exists(cache, namespace, ["finished"], exists = True)
+
+
+def test_should_get_and_set_many():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        cache = Cache(host, port, l1_max_bytes=1024)
+
+        namespace = "many-test"
+
+        cache.set_many(namespace, [("first", [1]), ("second", [2])])
+
+        assert cache.get_many(namespace, [[2], [3], [1]]) == ["second", MISSING, "first"]
+        assert_key_exists(cache, namespace, [1], exists = True)
+        assert_key_exists(cache, namespace, [3], exists = False)
+
+
+def test_should_report_lookup_tier():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        l2_cache = Cache(host, port)
+        l1_cache = Cache(host, port, l1_max_bytes=1024)
+
+        namespace = "lookup-test"
+        tiers = []
+
+        @l2_cache(namespace=namespace, on_lookup=tiers.append)
+        def l2_func(test_input: str):
+            return test_input
+
+        @l1_cache(namespace=namespace, on_lookup=tiers.append)
+        def l1_func(test_input: str):
+            return test_input
+
+        l2_func("value")
+        l2_func("value")
+        l1_func("value")
+        l1_func("value")
+
+        assert tiers == [None, "l2", "l2", "l1"]
+
+
+def test_should_pass_through_when_redis_is_down():
+    cache = Cache("localhost", 1, retry_interval=60)
+
+    calls = []
+
+    @cache(namespace="down-test")
+    def test_func(test_input: int):
+        calls.append(test_input)
+        return test_input
+
+    assert test_func(1) == 1
+    assert test_func(1) == 1
+    assert calls == [1, 1]
+    assert not cache.available
+
+
+def test_local_cache_should_drop_value_replaced_by_oversized_one():
+    local = LocalCache(max_bytes=10)
+
+    local.set("a", "small", size=4)
+    local.set("a", "large", size=11)
+
+    assert local.get("a") is MISSING
+    assert local.size == 0
+
+
+def test_should_fill_known_misses_without_another_lookup():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        cache = Cache(host, port)
+
+        namespace = "fill-test"
+
+        @cache(namespace=namespace)
+        def test_func(test_input: int):
+            return test_input
+
+        assert cache.get_many(test_func.namespace, [[1]]) == [MISSING]
+        assert test_func.fill(1) == 1
+        assert cache.stats()['l2']['misses'] == 1
+
+        assert test_func(1) == 1
+        assert cache.stats()['l2']['hits'] == 1
+
+
+def test_should_stay_available_when_pool_is_exhausted():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        cache = Cache(host, port, max_connections=1, pool_timeout=0.1)
+
+        # Hold the only connection
+        pool = cache._Cache__pool
+        connection = pool.get_connection("GET")
+        try:
+            assert cache.get("exhausted-test", 1) is MISSING
+            assert cache.available
+        finally:
+            pool.release(connection)
+
+        cache.set("exhausted-test", "value", 1)
+        assert cache.get("exhausted-test", 1) == "value"
+
+
+def test_should_return_value_when_redis_rejects_set():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        cache = Cache(host, port)
+
+        @cache(namespace="oom-test")
+        def test_func(test_input: int):
+            return test_input
+
+        oom = ResponseError("OOM command not allowed when used memory > 'maxmemory'.")
+        with patch.object(cache._Cache__client, "evalsha", side_effect=oom):
+            assert test_func(1) == 1
+
+        assert cache.available
+        assert cache.get(test_func.namespace, 1) is MISSING
+
+
+def test_local_cache_should_not_outlive_redis_ttl():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose:
+        (host, port) = assert_and_get_host_port(compose, REDIS_PORT)
+
+        writer = Cache(host, port)
+        reader = Cache(host, port, l1_max_bytes=1024, l1_ttl=60)
+
+        namespace = "l1-ttl-test"
+        writer.set(namespace, "value", 1, ttl=1)
+
+        assert reader.get(namespace, 1) == "value"
+        time.sleep(1.5)
+        assert reader.get(namespace, 1) is MISSING
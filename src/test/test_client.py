@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+
+from redis import StrictRedis
+from testcontainers.compose import DockerCompose
+
+from benchmarks.fake_wcl import FakeWCLServer
+from benchmarks.synthetic import generate_reports
+from cache import PREFIX, Cache
+from client import REPORT_FIELDS, WCLClient, get_report_index
+
+REDIS_PORT = 6379
+
+
+def create_client(compose, fake) -> WCLClient:
+    host = compose.get_service_host("redis-cache-test", REDIS_PORT)
+    port = compose.get_service_port("redis-cache-test", REDIS_PORT)
+
+    return WCLClient(
+        base_report_url=fake.url + '/v1/reports/guild/{guild}/{server}/{region}',
+        base_log_url=fake.url + '/v1/report/tables/{view}/{log_id}?end={end}&encounter={encounter}',
+        cache=Cache(host, port)
+    )
+
+
+def test_should_rebuild_report_index_from_report_list():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose, FakeWCLServer(report_count=3) as fake:
+        client = create_client(compose, fake)
+
+        expected = [
+            {field: report[field] for field in REPORT_FIELDS}
+            for report in generate_reports("sugar", 3)
+        ]
+
+        # Nothing was listed or indexed yet
+        reports = client.get_report_metadata(
+            "sugar", "firemaw", "EU", [report['id'] for report in expected] + ["unknown"]
+        )
+
+        assert reports == expected + [None]
+
+
+def test_should_cache_contribution_of_table_without_entries():
+    with tempfile.TemporaryDirectory() as fixtures_dir:
+        os.makedirs(os.path.join(fixtures_dir, "tables", "damage-done"))
+        with open(os.path.join(fixtures_dir, "tables", "damage-done", "empty.json"), "w") as file:
+            json.dump({"entries": []}, file)
+
+        with DockerCompose(
+            os.getcwd() + "/test",
+            compose_file_name="docker-compose.yml",
+            pull=True
+        ) as compose, FakeWCLServer(fixtures_dir) as fake:
+            client = create_client(compose, fake)
+
+            request = {'view': 'damage-done', 'log_id': 'empty', 'end': 1000, 'encounter': ''}
+
+            assert client.get_contributions([request]) == [{'name': [], 'type': [], 'share': []}]
+            requests_after_first_call = fake.requests
+
+            assert client.get_contributions([request]) == [{'name': [], 'type': [], 'share': []}]
+            assert fake.requests == requests_after_first_call
+
+
+def test_should_reindex_cached_report_list_only_when_index_is_lost():
+    with DockerCompose(
+        os.getcwd() + "/test",
+        compose_file_name="docker-compose.yml",
+        pull=True
+    ) as compose, FakeWCLServer(report_count=3) as fake:
+        client = create_client(compose, fake)
+        redis = StrictRedis(
+            compose.get_service_host("redis-cache-test", REDIS_PORT),
+            compose.get_service_port("redis-cache-test", REDIS_PORT)
+        )
+        index_key = f'{PREFIX}:{get_report_index("sugar", "firemaw", "EU")}'
+
+        report_ids = [report_option['value'] for report_option in client.get_reports("sugar", "firemaw", "EU")]
+        assert redis.exists(index_key)
+
+        # A read hit leaves the index alone
+        redis.delete(index_key)
+        client.get_reports("sugar", "firemaw", "EU")
+        assert not redis.exists(index_key)
+
+        reports = client.get_report_metadata("sugar", "firemaw", "EU", report_ids)
+
+        assert [report['id'] for report in reports] == report_ids
+        assert redis.exists(index_key)
+        assert fake.requests == 1
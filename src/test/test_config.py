@@ -0,0 +1,22 @@
+import config
+
+
+def test_get_encounter_options():
+    options = config.get_encounter_options(1000)
+    assert options[0] == {"label": "Encounters + Trash", "value": ""}
+    assert {"label": "Ragnaros", "value": 672} in options
+    assert config.get_encounter_options(1000) is options
+
+
+def test_get_encounter_options_for_unknown_zone():
+    assert config.get_encounter_options(-1) == ()
+
+
+def test_class_colors():
+    assert config.CLASS_COLORS["Rogue"] == "gold"
+    assert {"label": "Rogue", "value": "Rogue"} in config.CLASS_OPTIONS
+
+
+def test_load_guilds():
+    guilds = config.load_guilds("templates/guilds_template.yaml")
+    assert all({"guild", "server", "region"} <= set(guild) for guild in guilds.values())
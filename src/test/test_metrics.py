@@ -0,0 +1,49 @@
+from metrics import Registry
+
+
+def test_counter_should_render_labelled_totals():
+    registry = Registry()
+    counter = registry.counter("lookups", "Cache lookups.", ["tier"])
+    counter.inc(tier="l1")
+    counter.inc(2, tier="l2")
+
+    assert counter.value(tier="l2") == 2
+    assert registry.render().splitlines() == [
+        "# HELP lookups Cache lookups.",
+        "# TYPE lookups counter",
+        'lookups_total{tier="l1"} 1.0',
+        'lookups_total{tier="l2"} 2.0'
+    ]
+
+
+def test_histogram_should_render_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=[0.1, 1])
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    lines = registry.render().splitlines()
+
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_histogram_timer_should_observe_block():
+    registry = Registry()
+    histogram = registry.histogram("stage_seconds", "Stage.", ["stage"])
+
+    with histogram.time(stage="average") as timer:
+        pass
+
+    assert timer.elapsed >= 0
+    assert histogram.count(stage="average") == 1
+
+
+def test_registry_should_escape_label_values():
+    registry = Registry()
+    registry.counter("requests", "Requests.", ["endpoint"]).inc(endpoint='a"b')
+    assert 'requests_total{endpoint="a\\"b"} 1.0' in registry.render()
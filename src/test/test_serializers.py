@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from serializers import MAGIC, SerializationError, Serializer
+
+TEST_VALUE = {
+    "entries": [
+        {"name": "Lucas", "type": "Warrior", "total": 1337},
+        {"name": "Bob", "type": "Pet", "total": 42}
+    ]
+}
+
+
+@pytest.mark.parametrize("codec", ["json", "pickle"])
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_should_round_trip_value(codec, compression):
+    serializer = Serializer(codec, compression)
+    data, size = serializer.encode(TEST_VALUE)
+    assert data.startswith(MAGIC)
+    assert serializer.decode(data)[0] == TEST_VALUE
+
+
+def test_should_read_entries_written_with_other_settings():
+    data, _ = Serializer("pickle", "zlib").encode(TEST_VALUE)
+    assert Serializer("json", "none").decode(data)[0] == TEST_VALUE
+
+
+def test_should_read_legacy_json_entries():
+    data = json.dumps(TEST_VALUE).encode()
+    assert Serializer().decode(data) == (TEST_VALUE, len(data))
+
+
+def test_should_reject_unknown_version():
+    data, _ = Serializer().encode(TEST_VALUE)
+    data = MAGIC + bytes([99]) + data[len(MAGIC) + 1:]
+    with pytest.raises(SerializationError):
+        Serializer().decode(data)
+
+
+def test_should_report_compression_ratio():
+    serializer = Serializer("json", "zlib")
+    assert serializer.compression_ratio == 1.0
+    serializer.encode({"entries": [TEST_VALUE] * 100})
+    assert serializer.compression_ratio > 1
+
+
+@pytest.mark.parametrize("codec", ["json", "pickle"])
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_should_reject_truncated_entries(codec, compression):
+    data, _ = Serializer(codec, compression).encode(TEST_VALUE)
+    with pytest.raises(SerializationError):
+        Serializer().decode(data[:-5])
+
+
+def test_should_reject_unreadable_legacy_entries():
+    with pytest.raises(SerializationError):
+        Serializer().decode(b'{"entries": [')
@@ -0,0 +1,31 @@
+from store import LogStore
+
+PROJECTED_LOG = {
+    "entries": {
+        "name": ["Lucas", "Anna"],
+        "type": ["Warrior", "Mage"],
+        "total": [300.0, 100.0]
+    }
+}
+
+
+def test_should_return_none_for_missing_log(tmp_path):
+    store = LogStore(str(tmp_path / "logs.db"))
+    assert store.get("damage-done", "abc", 1000, "") is None
+
+
+def test_should_read_stored_log(tmp_path):
+    store = LogStore(str(tmp_path / "logs.db"))
+    store.put("damage-done", "abc", 1000, "", PROJECTED_LOG)
+
+    assert store.get("damage-done", "abc", 1000, "") == PROJECTED_LOG
+    assert store.get("damage-done", "abc", 1000, "", columns=["name", "total"]) == {
+        "entries": {"name": ["Lucas", "Anna"], "total": [300.0, 100.0]}
+    }
+    assert store.get("healing", "abc", 1000, "") is None
+
+
+def test_should_store_empty_log(tmp_path):
+    store = LogStore(str(tmp_path / "logs.db"))
+    store.put("damage-done", "abc", 1000, 663, {"entries": {}})
+    assert store.get("damage-done", "abc", 1000, 663) == {"entries": {}}
@@ -1,3 +1,4 @@
+from aggregation import normalize_log
 import utils
 
 
@@ -13,3 +14,42 @@ def test_get_reports_key():
     region = "EU"
     expected = f"<{guild}>-<{server}>-<{region}>"
     assert utils.get_reports_key(guild, server, region) == expected
+
+
+def test_project_log():
+    log = {
+        "entries": [
+            {"name": "Lucas", "type": "Warrior", "total": 100, "gear": []},
+            {"name": "Wolf", "type": "Pet", "total": 10, "gear": []}
+        ],
+        "totalTime": 1337
+    }
+    expected = {
+        "entries": {
+            "name": ["Lucas", "Wolf"],
+            "type": ["Warrior", "Pet"],
+            "total": [100, 10]
+        }
+    }
+    assert utils.project_log(log) == expected
+    assert utils.project_log({"entries": []}) == {"entries": {}}
+
+
+def test_average_contributions_matches_average_logs():
+    logs = [
+        {"entries": [
+            {"name": "Lucas", "type": "Warrior", "total": 300},
+            {"name": "Wolf", "type": "Pet", "total": 50},
+            {"name": "Anna", "type": "Mage", "total": 100}
+        ]},
+        {"entries": [
+            {"name": "Lucas", "type": "Warrior", "total": 100},
+            {"name": "Anna", "type": "Mage", "total": 100}
+        ]}
+    ]
+    contributions = []
+    for log in logs:
+        names, classes, shares = normalize_log(log)
+        contributions.append({"name": list(names), "type": list(classes), "share": list(shares)})
+
+    assert utils.average_contributions(contributions).equals(utils.average_logs(logs))
@@ -1,14 +1,24 @@
+import time
 from datetime import datetime
-
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from loggers.logger import Logger
 
+# pandas and the aggregation engine are imported on first use to keep worker boot fast
+if TYPE_CHECKING:
+    import pandas as pd
+
 # Initialize logger
 logger = Logger().getLogger(__file__)
 
 THRESHOLD_PERCENTAGE = 0.10
 
+# Reports are considered immutable this long after their end
+FINISHED_AFTER = 60 * 60 * 2
+
+# Entry fields average_logs aggregates on
+LOG_COLUMNS = ('name', 'type', 'total')
+
 
 def create_normalized_column(df, col_name):
     df[f'norm_{col_name}'] = 100 * df[col_name] / df[col_name].sum()
@@ -20,19 +30,46 @@ def drop_rows_where_col_has_value(df, col_name, value):
     return df
 
 
+def project_log(log, columns=LOG_COLUMNS):
+    """
+    Reduce a report table to a columnar {'entries': {column: [values]}} dict
+    holding only the given entry fields. pd.DataFrame reads it the same way
+    as the full list of entry records.
+    """
+    entries = log.get('entries') or []
+    if not entries:
+        return {'entries': {}}
+    return {
+        'entries': {
+            column: [entry.get(column) for entry in entries] for column in columns
+        }
+    }
+
+
 def average_logs(logs):
-    return pd.concat(
-        [
-            pd.DataFrame(log["entries"])[['name', 'type', 'total']]
-            .pipe(drop_rows_where_col_has_value, col_name='type', value='Pet')
-            .pipe(create_normalized_column, col_name='total') for log in logs
-        ]
-    ).groupby(['name']).agg(
-        _std=('norm_total', lambda x: x.unique().std()),  # just 'std' will use ddof = 1
-        _avg=('norm_total', 'mean'),
-        _counts=('name', 'size'),
-        _class=('type', 'max')
-    ).sort_values("_avg")
+    """
+    Average each player's share of the total over the logs. Returns a frame
+    indexed by name with _std, _avg, _counts and _class, sorted by _avg.
+    """
+    from aggregation import LogAverager
+
+    averager = LogAverager()
+    for log in logs:
+        averager.add_log(log)
+    return averager.result()
+
+
+def average_contributions(contributions):
+    """
+    Same as average_logs, for per-report contributions from
+    WCLClient.get_contribution.
+    """
+    from aggregation import LogAverager
+
+    averager = LogAverager()
+    for contribution in contributions:
+        averager.add_normalized(contribution['name'], contribution['type'], contribution['share'])
+    return averager.result()
 
 
 # Date parameters need to be converted to milliseconds Unix format
@@ -48,9 +85,17 @@ def parse_users(users):
     return user_dict
 
 
-def remove_irrelevant_roles(df: pd.DataFrame) -> pd.DataFrame:
+def remove_irrelevant_roles(df: 'pd.DataFrame') -> 'pd.DataFrame':
     logger.info(f"Removing players with avg less than {THRESHOLD_PERCENTAGE} of max.")
-    return df.query(f'_avg > _avg.max() * {THRESHOLD_PERCENTAGE}')
+    return df[df['_avg'] > df['_avg'].max() * THRESHOLD_PERCENTAGE]
+
+
+def is_finished(report: dict) -> bool:
+    """
+    Whether a report, as returned by the reports endpoint, ended long enough
+    ago that its tables will not change anymore. Timestamps are in ms.
+    """
+    return time.time() * 1000 - report['end'] > FINISHED_AFTER * 1000
 
 
 def get_reports_key(guild: str, server: str, region: str) -> str: